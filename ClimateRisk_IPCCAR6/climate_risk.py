@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Total loss for each WMO_Region
+WMO_REGION_LOSSES = {
+    'AFRICA_WMO': 38.5,
+    'ASIA_WMO': 1200,
+    'SOUTH AMERICA': 100.9,
+    'North America Central America and the Caribbean': 1700,
+    'SOUTH-WEST PACIFIC': 163.7,
+    'EUROPE': 476.5
+}
+
+# IPCC AR6 confidence letters (D = decreasing CID) mapped to signed weights
+CONFIDENCE_MAPPING = {
+    'H': 0.85,
+    'M': 0.5,
+    'DH': -0.85,
+    'DM': -0.5
+}
+
+###############################################################################
+#                        Step 1: WMO loss weighting
+###############################################################################
+def calculate_weighted_losses(df, region_losses):
+    """
+    Loss per WMO region and event: event share x region total loss, with
+    NaN shares and regions missing from region_losses giving 0. One
+    broadcast multiply over the whole event matrix; event columns without
+    any share stay integer 0 as in the row-wise version.
+    """
+    event_columns = df.columns[1:]
+    shares = df[event_columns].to_numpy(dtype=np.float64)
+    totals = df['WMO_Region'].map(region_losses).fillna(0).to_numpy(dtype=np.float64)
+    losses = np.where(np.isnan(shares), 0.0, shares * totals[:, None])
+
+    weighted_losses_df = df[['WMO_Region']].copy()
+    for i, event in enumerate(event_columns):
+        column = losses[:, i]
+        if df[event].isna().all():
+            column = column.astype(np.int64)
+        weighted_losses_df[event + '_Loss'] = column
+    return weighted_losses_df
+
+def calculate_weighted_losses_batch(df, loss_samples):
+    """
+    Weighted losses for many alternative WMO loss totals at once.
+
+    loss_samples: DataFrame with one column per WMO region and one row per
+        set of totals (e.g. draws from the reported uncertainty ranges);
+        regions without a column get 0 as in calculate_weighted_losses
+
+    Returns an array (samples, WMO regions, events) with rows in the order
+    of df; sample s equals calculate_weighted_losses(df, loss_samples.iloc[s]).
+    """
+    event_columns = df.columns[1:]
+    shares = np.nan_to_num(df[event_columns].to_numpy(dtype=np.float64), nan=0.0)
+    totals = loss_samples.reindex(columns=df['WMO_Region']).fillna(0).to_numpy(dtype=np.float64)
+    return totals[:, :, None] * shares[None, :, :]
+
+###############################################################################
+#                 Area proportions of the relevant AR6 regions
+###############################################################################
+def calculate_event_proportion_all(df):
+    """
+    Share of each AR6 region in the area of its WMO region over the regions
+    where a CID is relevant (not 'N'); NaN where it is not relevant or the
+    region has no WMO region.
+
+    One masked matrix for all CIDs: the area is broadcast over the relevance
+    mask (NaN where not relevant) and normalized by a per-WMO-region group
+    transform, so rows stay in place and no merge on Area is needed. CIDs
+    that are relevant nowhere get no column, as before.
+    """
+    extreme_event_columns = df.columns[df.columns.get_loc('ExtremeHeat'):]
+    relevant = df[extreme_event_columns].to_numpy() != 'N'
+    area = df['Area'].to_numpy(dtype=np.float64)
+
+    masked_area = pd.DataFrame(np.where(relevant, area[:, None], np.nan), index=df.index)
+    total_area = masked_area.groupby(df['WMO_Region'], dropna=True).transform('sum')
+    total_area = total_area.reindex(df.index).to_numpy()
+    # CIDs relevant nowhere in a WMO region sum to 0 there; those cells are masked
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proportions = np.where(relevant, area[:, None] / total_area, np.nan)
+
+    final_df = df[['WMO_Region', 'Name', 'Area']].copy()
+    for i, event_column in enumerate(extreme_event_columns):
+        if relevant[:, i].any():
+            final_df[f'{event_column}_Proportion'] = proportions[:, i]
+    return final_df
+
+###############################################################################
+#                  Step 2: losses distributed by area share
+###############################################################################
+def distribute_losses_by_area(area_factors_df, weighted_losses_df):
+    """
+    WMO event losses times the area proportion of each AR6 region. The
+    proportion columns may be named CID or CID_Proportion.
+    """
+    df = pd.merge(area_factors_df, weighted_losses_df, on='WMO_Region', how='left')
+    event_columns = df.columns[df.columns.str.endswith('_Loss')]
+    result_df = df[['WMO_Region', 'Name', 'Area']].copy()
+
+    for event in event_columns:
+        event_proportion_column = event.replace('_Loss', '')
+        if event_proportion_column not in df:
+            event_proportion_column += '_Proportion'
+
+        result_df[event + '_Distributed'] = df[event] * df[event_proportion_column]
+
+    return result_df
+
+###############################################################################
+#              Step 3-5: confidence weights, risk matrix, GDP
+###############################################################################
+def quantify_confidence(df, mapping=CONFIDENCE_MAPPING):
+    """
+    Confidence letters of the CID columns replaced by their weights
+    (letters outside the mapping become NaN)
+    """
+    df = df.copy()
+    for col in df.columns[df.columns.get_loc('ExtremeHeat'):]:
+        df[col] = df[col].map(mapping).astype('float64')
+    return df
+
+def risk_matrix(quantified_df, distributed_losses_df):
+    """
+    Region metadata plus confidence weight x distributed loss per CID; the
+    two tables are aligned by row position
+    """
+    non_numeric_columns = quantified_df.loc[:, :'ExtremeHeat'].iloc[:, :-1]
+    confidence = quantified_df.loc[:, 'ExtremeHeat':]
+    losses = distributed_losses_df.loc[:, 'ExtremeHeat_Loss_Distributed':]
+    losses.columns = confidence.columns
+    return pd.concat([non_numeric_columns, confidence * losses], axis=1)
+
+def risk_by_gdp(risk_matrix_df):
+    """
+    Region metadata plus TotalRiskbyGDP, the sum over CIDs of risk / GDP
+    """
+    metadata = risk_matrix_df.loc[:, :'GDP_billion']
+    weighted = risk_matrix_df.loc[:, 'ExtremeHeat':].div(risk_matrix_df['GDP_billion'], axis=0)
+    result = metadata.copy()
+    result['TotalRiskbyGDP'] = weighted.sum(axis=1)
+    return result
+
+def risk_thresholds(risk_by_gdp_df, max_oid=43, quantiles=(0.30, 0.70)):
+    """
+    Percentiles of TotalRiskbyGDP over the land regions (OID_ <= max_oid)
+    """
+    land = risk_by_gdp_df.loc[risk_by_gdp_df['OID_'] <= max_oid, 'TotalRiskbyGDP']
+    return {f'percentile_{round(q * 100)}': land.quantile(q) for q in quantiles}
@@ -0,0 +1,175 @@
+# Grid-cell resolution mode of the AR6 climate-risk index.
+#
+# Cells carry only an index into the AR6 region table (int16, -1 for ocean or
+# unassigned cells) plus their GDP; confidence letters and CID relevance stay
+# categorical at region level (regions x CIDs int8 codes / bool mask) and are
+# gathered per chunk of cells through that index. The Step2 - Step5 math is
+# the region-level one applied to cells:
+#
+#   share[c, e] = weight[c] / sum of weight over the cells of wmo(c) where e is relevant
+#   risk[c]     = sum_e confidence[region(c), e] * WMO loss[wmo(c), e] * share[c, e] / GDP[c]
+#
+# where the weight is the quantity losses are distributed by (the 'Area'
+# column of the relevance tables, which holds GDP_billion); by default the
+# cell GDP. Only land cells are stored in the output, as flat indices plus
+# float32 values in a compressed .npz.
+#
+#   python risk_grid.py region_grid.npz -o risk_grid.npz
+#
+# where region_grid.npz holds region_index (nlat x nlon) and optionally gdp,
+# weight, lat and lon.
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from climate_risk import CONFIDENCE_MAPPING, WMO_REGION_LOSSES, calculate_weighted_losses
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_LEVELS = list(CONFIDENCE_MAPPING)
+
+###############################################################################
+#                           Region-level arrays
+###############################################################################
+@stage
+def grid_arrays(relevance_df, loss_data_df, ipcc_df, region_losses=WMO_REGION_LOSSES):
+    """
+    Categorical region-level inputs of the gridded index; row r of every
+    array is row r of ipcc_df, the region a cell index points to
+    """
+    events = list(ipcc_df.columns[ipcc_df.columns.get_loc('ExtremeHeat'):])
+    if not (relevance_df['Name'].to_numpy() == ipcc_df['Name'].to_numpy()).all():
+        raise ValueError("relevance and IPCC tables list regions in a different order")
+
+    weighted = calculate_weighted_losses(loss_data_df, region_losses)
+    codes = pd.Categorical(ipcc_df[events].to_numpy().ravel(), categories=CONFIDENCE_LEVELS).codes
+    return {
+        'events': events,
+        'names': ipcc_df['Name'].to_numpy(),
+        'confidence_codes': codes.reshape(len(ipcc_df), len(events)).astype(np.int8),
+        'relevant': relevance_df[events].to_numpy() != 'N',
+        'wmo_index': pd.Index(weighted['WMO_Region']).get_indexer(relevance_df['WMO_Region']),
+        'wmo_losses': weighted[[f'{e}_Loss' for e in events]].to_numpy(dtype=np.float64),
+        'gdp': ipcc_df['GDP_billion'].to_numpy(dtype=np.float64),
+    }
+
+def region_gdp_by_cell(arrays, region_index):
+    """
+    Cell GDP when no gridded GDP is available: each region's GDP split
+    evenly over its cells
+    """
+    land = region_index >= 0
+    counts = np.bincount(region_index[land], minlength=len(arrays['gdp']))
+    gdp = np.zeros(region_index.shape, dtype=np.float64)
+    gdp[land] = arrays['gdp'][region_index[land]] / counts[region_index[land]]
+    return gdp
+
+###############################################################################
+#                                Cell risk
+###############################################################################
+def _cell_mask(arrays, regions):
+    wmo = arrays['wmo_index'][regions]
+    return arrays['relevant'][regions] & (wmo >= 0)[:, None], wmo
+
+@stage(rows=lambda result: len(result[0]))
+def grid_risk(arrays, region_index, gdp=None, weight=None, chunk=1 << 18):
+    """
+    TotalRiskbyGDP of every land cell.
+
+    region_index: integer grid (any shape) of rows of the IPCC table, -1 for
+        cells outside every region
+    gdp, weight: grids of the same shape; gdp defaults to region_gdp_by_cell
+        and weight to gdp
+    Returns (cells, risk): flat indices of the land cells and their risk.
+    Cells are processed chunk at a time in two passes, first the relevant
+    weight per WMO region and CID, then the risk.
+    """
+    region_index = np.asarray(region_index).ravel()
+    if gdp is None:
+        gdp = region_gdp_by_cell(arrays, region_index)
+    gdp = np.asarray(gdp, dtype=np.float64).ravel()
+    weight = gdp if weight is None else np.asarray(weight, dtype=np.float64).ravel()
+
+    cells = np.flatnonzero(region_index >= 0).astype(np.int64)
+    n_wmo, n_events = arrays['wmo_losses'].shape
+    event_ids = np.arange(n_events)
+
+    totals = np.zeros(n_wmo * n_events)
+    for start in range(0, len(cells), chunk):
+        idx = cells[start:start + chunk]
+        mask, wmo = _cell_mask(arrays, region_index[idx])
+        keys = (np.maximum(wmo, 0)[:, None] * n_events + event_ids)[mask]
+        totals += np.bincount(keys, weights=np.broadcast_to(weight[idx, None], mask.shape)[mask],
+                              minlength=n_wmo * n_events)
+    totals = totals.reshape(n_wmo, n_events)
+
+    confidence_weights = np.array([CONFIDENCE_MAPPING[c] for c in CONFIDENCE_LEVELS] + [np.nan])
+    risk = np.empty(len(cells))
+    for start in range(0, len(cells), chunk):
+        idx = cells[start:start + chunk]
+        regions = region_index[idx]
+        mask, wmo = _cell_mask(arrays, regions)
+        wmo = np.maximum(wmo, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(mask, weight[idx, None] / totals[wmo], np.nan)
+            weighted = (confidence_weights[arrays['confidence_codes'][regions]] *
+                        arrays['wmo_losses'][wmo] * share / gdp[idx, None])
+        risk[start:start + len(idx)] = np.nansum(weighted, axis=1)
+    logger.info(f"risk for {len(cells)} land cells of {len(region_index)}")
+    return cells, risk
+
+###############################################################################
+#                                Grid files
+###############################################################################
+def global_grid(resolution=0.25):
+    """
+    Cell-centre latitudes (north to south) and longitudes of a global grid
+    """
+    lat = np.arange(90 - resolution / 2, -90, -resolution)
+    lon = np.arange(-180 + resolution / 2, 180, resolution)
+    return lat, lon
+
+def save_risk_grid(file_path, cells, risk, shape, lat=None, lon=None):
+    """
+    Land cells only: flat indices (int32) and risk (float32), compressed
+    """
+    if lat is None or lon is None:
+        lat, lon = global_grid(180 / shape[0])
+    np.savez_compressed(file_path, cells=cells.astype(np.int32), risk=risk.astype(np.float32),
+                        shape=np.asarray(shape, dtype=np.int64), lat=lat, lon=lon)
+
+def read_risk_grid(file_path):
+    """
+    Dense (nlat, nlon) float32 risk grid (NaN outside land cells), lat, lon
+    """
+    with np.load(file_path) as data:
+        grid = np.full(int(np.prod(data['shape'])), np.nan, dtype=np.float32)
+        grid[data['cells']] = data['risk']
+        return grid.reshape(tuple(data['shape'])), data['lat'], data['lon']
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Gridded AR6 climate-risk index")
+    parser.add_argument('region_grid', help="npz with region_index and optional gdp, weight, lat, lon")
+    parser.add_argument('--chunk', type=int, default=1 << 18)
+    parser.add_argument('-o', '--output', default='risk_grid.npz')
+    args = parser.parse_args()
+
+    arrays = grid_arrays(pd.read_csv('./RiskRelevance_240928_GDP.csv'),
+                         pd.read_csv('./WMO_LossData_mapping.csv'),
+                         pd.read_csv('./IPCC_ClimateRiskv3_revisegdp_240927v2.csv'))
+    with np.load(args.region_grid) as data:
+        inputs = {k: data[k] for k in data.files}
+    region_index = inputs['region_index']
+    cells, risk = grid_risk(arrays, region_index, inputs.get('gdp'), inputs.get('weight'), args.chunk)
+    save_risk_grid(args.output, cells, risk, region_index.shape, inputs.get('lat'), inputs.get('lon'))
+    print(f"{len(cells)} land cells -> {args.output}")
@@ -0,0 +1,195 @@
+# Monte Carlo uncertainty propagation for the AR6 climate-risk index.
+#
+# The Step2 -> Step5 chain of Quantifyclimaterisk_GDP_PPP_total.py is
+# evaluated as array operations over samples x regions x CIDs:
+#
+#   loss[s, r, e]   = WMO total[s, wmo(r)] * WMO event share[wmo(r), e] * area proportion[r, e]
+#   risk[s, r]      = sum_e confidence[s, letter(r, e)] * loss[s, r, e] / GDP[s, r]
+#
+# with the confidence weights of H/M/DH/DM, the WMO loss totals and GDP drawn
+# per sample. Each sample's 30th/70th percentile thresholds are taken over the
+# land regions (OID_ <= 43) as in the point estimate.
+#
+#   python risk_montecarlo.py --samples 100000 --workers 8
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from climate_risk import CONFIDENCE_MAPPING, WMO_REGION_LOSSES
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_LEVELS = list(CONFIDENCE_MAPPING)
+
+# uniform sampling ranges of the confidence weights
+CONFIDENCE_RANGES = {
+    'H': (0.7, 1.0),
+    'M': (0.3, 0.7),
+    'DH': (-1.0, -0.7),
+    'DM': (-0.7, -0.3),
+}
+
+LOSS_SPREAD = 0.5   # WMO totals uniform within +/- 50 % of the reported values
+GDP_SIGMA = 0.1     # lognormal sigma of a multiplicative GDP error
+
+LAND_MAX_OID = 43
+PERCENTILES = (30, 70)
+SUMMARY_PERCENTILES = (5, 50, 95)
+
+###############################################################################
+#                               Model arrays
+###############################################################################
+@stage
+def risk_arrays(area_factors_df, loss_data_df, ipcc_df):
+    """
+    Sample-independent arrays of the risk chain.
+
+    area_factors_df: Risk_Relevance_factors_withGDP.csv (CID or CID_Proportion
+        columns), rows in the order of ipcc_df
+    loss_data_df: WMO_LossData_mapping.csv, event shares per WMO region
+    ipcc_df: IPCC_ClimateRiskv3 table with confidence letters and GDP_billion
+    """
+    events = list(ipcc_df.columns[ipcc_df.columns.get_loc('ExtremeHeat'):])
+    factors = area_factors_df.rename(columns=lambda c: c.replace('_Proportion', ''))
+    if not (factors['Name'].to_numpy() == ipcc_df['Name'].to_numpy()).all():
+        raise ValueError("area factors and IPCC table list regions in a different order")
+
+    wmo_regions = list(loss_data_df['WMO_Region'])
+    shares = np.nan_to_num(loss_data_df[events].to_numpy(dtype=np.float64), nan=0.0)
+    # regions without a WMO loss row (e.g. polar and ocean) get NaN losses, as the left merge
+    wmo_index = pd.Index(wmo_regions).get_indexer(factors['WMO_Region'])
+    mapped = wmo_index >= 0
+    base = np.full((len(factors), len(events)), np.nan)
+    base[mapped] = shares[wmo_index[mapped]] * factors[events].to_numpy(dtype=np.float64)[mapped]
+
+    codes = pd.Categorical(ipcc_df[events].to_numpy().ravel(), categories=CONFIDENCE_LEVELS).codes
+    return {
+        'events': events,
+        'names': ipcc_df['Name'].to_numpy(),
+        'wmo_regions': wmo_regions,
+        'wmo_index': np.where(mapped, wmo_index, 0),
+        'base_loss': base,
+        'confidence_codes': codes.reshape(len(ipcc_df), len(events)),
+        'gdp': ipcc_df['GDP_billion'].to_numpy(dtype=np.float64),
+        'land': (ipcc_df['OID_'] <= LAND_MAX_OID).to_numpy(),
+    }
+
+def total_risk(arrays, confidence_weights, loss_totals, gdp):
+    """
+    TotalRiskbyGDP for a batch of samples, shape (samples, regions).
+
+    confidence_weights: (samples, 4) weights of CONFIDENCE_LEVELS
+    loss_totals: (samples, WMO regions) totals in the order of arrays['wmo_regions']
+    gdp: (samples, regions)
+    Letters outside the mapping and missing losses contribute nothing, as
+    the NaN-skipping row sum of Step5.
+    """
+    # a NaN weight column for cells without a confidence letter (code -1)
+    weights = np.concatenate([confidence_weights, np.full((len(confidence_weights), 1), np.nan)], axis=1)
+    confidence = weights[:, arrays['confidence_codes']]
+    losses = loss_totals[:, arrays['wmo_index'], None] * arrays['base_loss'][None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted = confidence * losses / gdp[:, :, None]
+    return np.nansum(weighted, axis=2)
+
+def point_inputs(arrays, region_losses=WMO_REGION_LOSSES):
+    """
+    The deterministic inputs of the published index as a batch of one sample
+    """
+    confidence_weights = np.array([[CONFIDENCE_MAPPING[c] for c in CONFIDENCE_LEVELS]], dtype=np.float64)
+    loss_totals = np.array([[region_losses.get(r, 0) for r in arrays['wmo_regions']]], dtype=np.float64)
+    return confidence_weights, loss_totals, arrays['gdp'][None, :]
+
+###############################################################################
+#                                 Sampling
+###############################################################################
+def sample_inputs(arrays, n, rng, region_losses=WMO_REGION_LOSSES, confidence_ranges=CONFIDENCE_RANGES,
+                  loss_spread=LOSS_SPREAD, gdp_sigma=GDP_SIGMA):
+    """
+    n draws of confidence weights (one per letter and sample), WMO loss
+    totals and GDP (independent per region)
+    """
+    low = np.array([confidence_ranges[c][0] for c in CONFIDENCE_LEVELS])
+    high = np.array([confidence_ranges[c][1] for c in CONFIDENCE_LEVELS])
+    confidence_weights = rng.uniform(low, high, size=(n, len(CONFIDENCE_LEVELS)))
+
+    totals = np.array([region_losses.get(r, 0) for r in arrays['wmo_regions']], dtype=np.float64)
+    loss_totals = totals * rng.uniform(1 - loss_spread, 1 + loss_spread, size=(n, len(totals)))
+
+    gdp = arrays['gdp'] * rng.lognormal(0.0, gdp_sigma, size=(n, len(arrays['gdp'])))
+    return confidence_weights, loss_totals, gdp
+
+def _run_chunk(arrays, n, seed, sampling):
+    rng = np.random.default_rng(seed)
+    risk = total_risk(arrays, *sample_inputs(arrays, n, rng, **sampling))
+    thresholds = np.percentile(risk[:, arrays['land']], PERCENTILES, axis=1).T
+    return risk, thresholds
+
+@stage(rows=lambda result: len(result['samples']))
+def monte_carlo_risk(arrays, samples=100_000, seed=0, chunk=5_000, workers=None, **sampling):
+    """
+    Sample the risk index and return
+        regions     per-region mean, std, p5/p50/p95 of TotalRiskbyGDP, the
+                    point estimate and the probabilities of lying above the
+                    sample's 70th / below its 30th percentile threshold
+        thresholds  per-sample 30th / 70th percentiles over land regions
+        samples     the (samples, regions) risk array
+
+    Samples are drawn in fixed chunks with one child seed each, so results
+    do not depend on the number of workers. workers=1 runs in-process.
+    """
+    sizes = [min(chunk, samples - start) for start in range(0, samples, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([arrays] * len(sizes), sizes, seeds, [sampling] * len(sizes))
+    if workers == 1 or len(sizes) == 1:
+        results = list(map(_run_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_chunk, *args))
+    risk = np.concatenate([r for r, _ in results])
+    thresholds = np.concatenate([t for _, t in results])
+    logger.info(f"{len(risk)} samples in {len(sizes)} chunks")
+
+    low, high = thresholds[:, 0:1], thresholds[:, 1:2]
+    p5, p50, p95 = np.percentile(risk, SUMMARY_PERCENTILES, axis=0)
+    regions = pd.DataFrame({
+        'Name': arrays['names'],
+        'point': total_risk(arrays, *point_inputs(arrays))[0],
+        'mean': risk.mean(axis=0),
+        'std': risk.std(axis=0),
+        'p5': p5,
+        'p50': p50,
+        'p95': p95,
+        'prob_above_p70': (risk > high).mean(axis=0),
+        'prob_below_p30': (risk < low).mean(axis=0),
+    })
+    thresholds = pd.DataFrame(thresholds, columns=[f'p{p}' for p in PERCENTILES])
+    return {'regions': regions, 'thresholds': thresholds, 'samples': risk}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Monte Carlo AR6 climate-risk index")
+    parser.add_argument('--samples', type=int, default=100_000)
+    parser.add_argument('--chunk', type=int, default=5_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='MonteCarlo_TotalRiskbyGDP.csv')
+    args = parser.parse_args()
+
+    arrays = risk_arrays(pd.read_csv('./Risk_Relevance_factors_withGDP.csv'),
+                         pd.read_csv('./WMO_LossData_mapping.csv'),
+                         pd.read_csv('./IPCC_ClimateRiskv3_revisegdp_240927v2.csv'))
+    result = monte_carlo_risk(arrays, args.samples, args.seed, args.chunk, args.workers)
+    result['regions'].to_csv(args.output, index=False)
+    print(result['regions'].head())
+    print(result['thresholds'].describe())
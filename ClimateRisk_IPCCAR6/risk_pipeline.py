@@ -0,0 +1,199 @@
+# In-memory DAG of the AR6 climate-risk chain.
+#
+#   relevance   -> proportions        (Risk_Relevance_Calculation_GDP.py)
+#   loss_mapping -> weighted_losses   (Step 1)
+#   proportions + weighted_losses -> distributed_losses   (Step 2)
+#   ipcc + confidence_mapping -> quantified   (Step 3)
+#   quantified + distributed_losses -> risk_matrix         (Step 4)
+#   risk_matrix -> risk_by_gdp        (Step 5)
+#
+# Stages pass DataFrames directly; the intermediate CSVs of the original
+# scripts are written only when asked for. Every stage output is cached in
+# .risk_cache/ under a hash of the stage name, the source of the module
+# defining the stage function (so helpers and constants are covered) and the
+# content of its inputs, so a rerun only recomputes stages downstream of a
+# change.
+#
+#   python risk_pipeline.py                  # all stages, no CSVs
+#   python risk_pipeline.py --write-csv      # also write the Step CSVs
+
+import argparse
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from climate_risk import (CONFIDENCE_MAPPING, WMO_REGION_LOSSES, calculate_event_proportion_all, calculate_weighted_losses,
+                          distribute_losses_by_area, quantify_confidence, risk_matrix, risk_by_gdp,
+                          risk_thresholds)
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.risk_cache'
+CACHE_VERSION = 2
+
+INPUT_FILES = {
+    'relevance': 'RiskRelevance_240928_GDP.csv',
+    'loss_mapping': 'WMO_LossData_mapping.csv',
+    'ipcc': 'IPCC_ClimateRiskv3_revisegdp_240927v2.csv',
+}
+
+# name: (function, inputs, CSV written on request, leading text columns)
+STAGES = {
+    'proportions': (calculate_event_proportion_all, ['relevance'],
+                    'Risk_Relevance_factors_withGDP.csv', ['WMO_Region', 'Name']),
+    'weighted_losses': (calculate_weighted_losses, ['loss_mapping', 'region_losses'],
+                        'WMO_LossData_Weighted_Losses_by_Event.csv', ['WMO_Region']),
+    'distributed_losses': (distribute_losses_by_area, ['proportions', 'weighted_losses'],
+                           'Step2New_Distributed_Losses_by_Area_0928.csv', ['WMO_Region', 'Name']),
+    'quantified': (quantify_confidence, ['ipcc', 'confidence_mapping'],
+                   'Step3_IPCC_ClimateRiskv3_revisegdp_240927v2_quantified.csv',
+                   ['WMO_Region', 'Continent', 'Type', 'Name', 'Acronym']),
+    'risk_matrix': (risk_matrix, ['quantified', 'distributed_losses'],
+                    'Step4New_Result_Matrix_Pointwise_Multiplication_with_metadata.csv',
+                    ['WMO_Region', 'Continent', 'Type', 'Name', 'Acronym']),
+    'risk_by_gdp': (risk_by_gdp, ['risk_matrix'],
+                    'Step5New_Final_Weighted_Matrix_by_GDP.csv',
+                    ['WMO_Region', 'Continent', 'Type', 'Name', 'Acronym']),
+}
+
+###############################################################################
+#                               Content hashing
+###############################################################################
+def content_hash(value):
+    """
+    Hash of a DataFrame's columns, dtypes and values, or of a JSON-able value
+    """
+    h = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        h.update(json.dumps([list(map(str, value.columns)), list(map(str, value.dtypes))]).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    else:
+        h.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def _source_hash(func):
+    """
+    Hash of the source of the module defining a stage function, so editing
+    the stage, a helper it calls or a module constant it reads invalidates
+    its cache
+    """
+    try:
+        source = inspect.getsource(inspect.getmodule(func))
+    except (OSError, TypeError):
+        source = func.__qualname__
+    return hashlib.sha256(source.encode()).hexdigest()
+
+def _typed(name, frame):
+    """
+    Check a stage output: text key columns present, every other column numeric
+    """
+    text_columns = STAGES[name][3]
+    missing = [c for c in text_columns if c not in frame.columns]
+    if missing:
+        raise ValueError(f"stage {name} returned no {missing} columns")
+    for col in frame.columns:
+        if col not in text_columns and not pd.api.types.is_numeric_dtype(frame[col]):
+            raise TypeError(f"stage {name} column {col} has non-numeric dtype {frame[col].dtype}")
+    return frame
+
+###############################################################################
+#                                  Pipeline
+###############################################################################
+def _dependencies(targets):
+    order = []
+    def visit(name):
+        if name in order or name not in STAGES:
+            return
+        for dep in STAGES[name][1]:
+            visit(dep)
+        order.append(name)
+    for target in targets:
+        if target not in STAGES:
+            raise KeyError(f"unknown stage {target!r}, expected one of {list(STAGES)}")
+        visit(target)
+    return order
+
+@stage
+def load_inputs(data_dir='.', inputs=None):
+    """
+    Raw input frames, read from data_dir unless given in `inputs`
+    """
+    frames = dict(inputs or {})
+    for name, file_name in INPUT_FILES.items():
+        if name not in frames:
+            frames[name] = pd.read_csv(Path(data_dir) / file_name)
+    return frames
+
+def run_pipeline(targets=None, inputs=None, region_losses=WMO_REGION_LOSSES,
+                 confidence_mapping=CONFIDENCE_MAPPING, data_dir='.', write_csv=False, output_dir='.',
+                 cache_dir=CACHE_DIR_NAME, use_cache=True):
+    """
+    Compute the requested stages (default all) and their dependencies.
+
+    inputs: optional {name: DataFrame} overriding the files in INPUT_FILES
+    region_losses, confidence_mapping: hashed like the input frames
+    write_csv: True for the CSV of every computed stage, or a list of stages
+    Returns {stage: DataFrame} plus 'thresholds' when risk_by_gdp was computed.
+    """
+    values = load_inputs(data_dir, inputs)
+    values['region_losses'] = region_losses
+    values['confidence_mapping'] = confidence_mapping
+    hashes = {name: content_hash(value) for name, value in values.items()}
+    if write_csv is True:
+        write_csv = list(STAGES)
+    write_csv = set(write_csv or [])
+    if use_cache:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for name in _dependencies(targets or list(STAGES)):
+        func, deps, csv_name, _ = STAGES[name]
+        key = hashlib.sha256(json.dumps([CACHE_VERSION, name, _source_hash(func)] +
+                                        [hashes[d] for d in deps]).encode()).hexdigest()
+        cache_path = Path(cache_dir) / f'{name}_{key[:20]}.pkl'
+        if use_cache and cache_path.exists():
+            with stage(f'risk_pipeline.{name}', cached=True) as s:
+                frame = pd.read_pickle(cache_path)
+                s.rows = len(frame)
+            logger.info(f"{name}: inputs unchanged, using cache")
+        else:
+            with stage(f'risk_pipeline.{name}', cached=False) as s:
+                frame = _typed(name, func(*[values[d] for d in deps]))
+                s.rows = len(frame)
+            if use_cache:
+                tmp = cache_path.with_name(f'.{cache_path.name}.{os.getpid()}.tmp')
+                frame.to_pickle(tmp)
+                os.replace(tmp, cache_path)
+            logger.info(f"{name}: computed {frame.shape}")
+        values[name] = results[name] = frame
+        hashes[name] = key
+        if name in write_csv:
+            with stage(f'risk_pipeline.{name}.to_csv', rows=len(frame)):
+                frame.to_csv(Path(output_dir) / csv_name, index=False)
+
+    if 'risk_by_gdp' in results:
+        results['thresholds'] = risk_thresholds(results['risk_by_gdp'])
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="AR6 climate-risk pipeline")
+    parser.add_argument('targets', nargs='*', default=None, help=f"stages, any of {list(STAGES)}")
+    parser.add_argument('--write-csv', action='store_true', help="write the CSV of every computed stage")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    results = run_pipeline(args.targets or None, write_csv=args.write_csv, use_cache=not args.no_cache)
+    if 'thresholds' in results:
+        print(results['risk_by_gdp'].head())
+        print(results['thresholds'])
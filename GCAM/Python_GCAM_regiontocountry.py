@@ -1,29 +1,19 @@
 import pandas as pd
 
+from gcam_mapping import load_region_mapping, regions_to_countries
 
-electrification_rate_df = pd.read_csv('./Final_electrification_rate.csv')
-#electrification_rate_df = pd.read_csv('./Final_electrification_rate_addmissing.csv')
-region_to_country_df = pd.read_excel('./Region_to_Country.xlsx')
 
+def main():
+    electrification_rate_df = pd.read_csv('./Final_electrification_rate.csv')
+    #electrification_rate_df = pd.read_csv('./Final_electrification_rate_addmissing.csv')
 
-country_electrification_df = pd.DataFrame()
+    # one row per (region, country), then a single merge for every scenario
+    country_mapping = load_region_mapping('./Region_to_Country.xlsx')
+    country_electrification_df = regions_to_countries(electrification_rate_df, country_mapping)
 
+    country_electrification_df.to_csv('./country_electrification_rates.csv', index=False)
+    #country_electrification_df.to_csv('./country_electrification_rates_addmissing.csv', index=False)
 
-for index, row in region_to_country_df.iterrows():
-    region = row['GCAM Region']
-    countries = row['Countries'].split(', ')
-    rate_data = electrification_rate_df[electrification_rate_df['region'] == region]
 
-
-    for country in countries:
-        country_data = rate_data.copy()
-        country_data['country'] = country
-        country_data.drop('region', axis=1, inplace=True)
-        country_data.rename(columns=lambda x: x.strip(), inplace=True)
-        country_electrification_df = pd.concat([country_electrification_df, country_data])
-
-
-country_electrification_df.reset_index(drop=True, inplace=True)
-
-country_electrification_df.to_csv('./country_electrification_rates.csv', index=False)
-#country_electrification_df.to_csv('./country_electrification_rates_addmissing.csv', index=False)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Batch region -> country mapping for many GCAM scenarios.
+#
+# Every input is either a regional rate table laid out like
+# Final_electrification_rate.csv (scenario column, region, one column per
+# year) or a pair of raw GCAM exports ELECTRICITY,FINAL_ENERGY from which the
+# rates are derived (gcam_electrification.py). Inputs are processed in worker
+# processes against one cached copy of the Region_to_Country.xlsx mapping and
+# consolidated into a single long table keyed by scenario / country / year.
+# When inputs overlap, later inputs on the command line win, so a patch table
+# such as Final_electrification_rate_addmissing.csv can be listed after the
+# main one. An export pair is given as ELECTRICITY,FINAL_ENERGY.
+#
+#   python gcam_batch.py Final_electrification_rate.csv Final_electrification_rate_addmissing.csv
+#   python gcam_batch.py runs/ssp2/elec.csv,runs/ssp2/final.csv patch.csv -o rates.parquet
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from gcam_cache import has_pyarrow
+from gcam_electrification import electrification_rates, year_columns
+from gcam_mapping import REGION_TO_COUNTRY_FILE, load_region_mapping, regions_to_countries
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ['scenario', 'country', 'year']
+
+# spellings of the scenario column in GCAM-derived tables
+SCENARIO_COLUMNS = ['scenario', 'Scenario', 'sceanrio']
+
+###############################################################################
+#                               Scenario inputs
+###############################################################################
+def read_rate_table(file_path):
+    """
+    Regional rate table with the scenario column named 'scenario'; tables
+    without one are labelled with the file name
+    """
+    rates = pd.read_csv(file_path).rename(columns=lambda x: x.strip())
+    found = [c for c in SCENARIO_COLUMNS if c in rates.columns]
+    if found:
+        rates = rates.rename(columns={found[0]: 'scenario'})
+    else:
+        rates.insert(0, 'scenario', Path(file_path).stem)
+    return rates
+
+def load_rates(source, use_cache=True):
+    """
+    Regional rates of one input: a rate table path or an
+    (electricity, final_energy) pair of raw exports
+    """
+    if isinstance(source, (tuple, list)):
+        return electrification_rates(*source, use_cache=use_cache)
+    return read_rate_table(source)
+
+@stage
+def country_rates(source, country_mapping, use_cache=True):
+    """
+    Long scenario, country, year, rate table for one input
+    """
+    rates = load_rates(source, use_cache)
+    countries = regions_to_countries(rates[['scenario', 'region'] + year_columns(rates)], country_mapping)
+    long = countries.melt(id_vars=['scenario', 'country'], var_name='year', value_name='rate')
+    long['year'] = long['year'].astype('int16')
+    logger.info(f"{source}: {countries['scenario'].nunique()} scenarios, {len(long)} rows")
+    return long
+
+###############################################################################
+#                                    Batch
+###############################################################################
+@stage
+def run_batch(sources, mapping_file=REGION_TO_COUNTRY_FILE, workers=None, use_cache=True):
+    """
+    Consolidated country rates for every input, sorted by scenario / country
+    / year. workers=1 runs in-process; otherwise inputs are processed in a
+    process pool.
+    """
+    country_mapping = load_region_mapping(mapping_file, use_cache=use_cache)
+    if workers == 1 or len(sources) <= 1:
+        pieces = [country_rates(source, country_mapping, use_cache) for source in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pieces = list(pool.map(country_rates, sources, [country_mapping] * len(sources),
+                                   [use_cache] * len(sources)))
+
+    result = pd.concat(pieces, ignore_index=True)
+    result = result.drop_duplicates(KEY_COLUMNS, keep='last')
+    result = result.sort_values(KEY_COLUMNS, ignore_index=True)
+    for col in ['scenario', 'country']:
+        result[col] = result[col].astype('category')
+    return result
+
+def write_batch(result, output):
+    """
+    Parquet output (CSV when the name ends in .csv or pyarrow is missing)
+    """
+    output = Path(output)
+    if output.suffix != '.csv' and not has_pyarrow():
+        logger.warning("pyarrow not installed, writing CSV instead of parquet")
+        output = output.with_suffix('.csv')
+    if output.suffix == '.csv':
+        result.to_csv(output, index=False)
+    else:
+        result.to_parquet(output, index=False)
+    return output
+
+def _source(arg):
+    """
+    Command-line input: a rate table path or an ELECTRICITY,FINAL_ENERGY pair
+    """
+    parts = arg.split(',')
+    if len(parts) > 2:
+        raise argparse.ArgumentTypeError(f"expected a rate table or ELECTRICITY,FINAL_ENERGY, got {arg!r}")
+    return tuple(parts) if len(parts) == 2 else arg
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Region-to-country mapping for many GCAM scenarios")
+    parser.add_argument('sources', nargs='+', type=_source, metavar='TABLE|ELECTRICITY,FINAL_ENERGY',
+                        help="regional rate tables or raw GCAM export pairs, later ones override earlier")
+    parser.add_argument('--mapping', default=REGION_TO_COUNTRY_FILE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('-o', '--output', default='country_electrification_rates.parquet')
+    args = parser.parse_args()
+
+    result = run_batch(args.sources, args.mapping, workers=args.workers, use_cache=not args.no_cache)
+    output = write_batch(result, args.output)
+    print(f"{result['scenario'].nunique()} scenarios, {result['country'].nunique()} countries, "
+          f"{len(result)} rows -> {output}")
@@ -0,0 +1,62 @@
+# Parquet cache for parsed GCAM inputs in .gcam_cache/.
+#
+# An entry is keyed by the resolved path, size and mtime of its source files
+# plus any parameters that change the parsed result, so a modified export or
+# workbook simply misses the cache and is parsed again.
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.gcam_cache'
+CACHE_VERSION = 1
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def cache_path(name, sources, cache_dir=None, **params):
+    """
+    Cache file for `name` built from `sources`; cache_dir defaults to
+    .gcam_cache/ next to the first source
+    """
+    fingerprint = {'version': CACHE_VERSION, 'name': name, 'params': params, 'sources': []}
+    for path in sources:
+        stat = os.stat(path)
+        fingerprint['sources'].append([str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns])
+    key = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:20]
+    if cache_dir is None:
+        cache_dir = Path(sources[0]).parent / CACHE_DIR_NAME
+    return Path(cache_dir) / f'{name}_{key}.parquet'
+
+def cached_frame(name, sources, build, cache_dir=None, use_cache=True, **params):
+    """
+    build() served from the parquet cache when no source changed. Falls back
+    to calling build() every time when pyarrow is not installed.
+    """
+    if use_cache and not has_pyarrow():
+        logger.warning(f"pyarrow not installed, building {name} without cache")
+        use_cache = False
+    if not use_cache:
+        return build()
+
+    path = cache_path(name, sources, cache_dir, **params)
+    if path.exists():
+        return pd.read_parquet(path)
+
+    frame = build()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    logger.info(f"cached {name} -> {path}")
+    return frame
@@ -0,0 +1,169 @@
+# Electrification rates derived directly from the GCAM query exports
+#
+#   rate = electricity consumption / final energy consumption
+#
+# by scenario x region x sector x year, from GCAM_electrictyconsumptionbysector.csv
+# and GCAM_finalenergyconsumptionbysector.csv. Region totals reproduce
+# Final_electrification_rate.csv. The sector-level sums are cached as parquet
+# in .gcam_cache/ keyed by the size and mtime of both exports, so multi-scenario
+# exports are parsed once.
+#
+#   python gcam_electrification.py                       # region table
+#   python gcam_electrification.py --level sector -o electrification_by_sector.csv
+
+import argparse
+import csv
+import logging
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from gcam_cache import cached_frame
+
+logger = logging.getLogger(__name__)
+
+ELECTRICITY_FILE = 'GCAM_electrictyconsumptionbysector.csv'
+FINAL_ENERGY_FILE = 'GCAM_finalenergyconsumptionbysector.csv'
+
+KEY_COLUMNS = ['scenario', 'region', 'sector']
+
+# GCAM regions folded into the regions of Region_to_Country.xlsx
+REGION_ALIASES = {
+    'Taiwan': 'China',
+    'Central America and Caribbean': 'Central America and the Caribbean',
+}
+
+YEAR_PATTERN = re.compile(r'^\d{4}$')
+
+###############################################################################
+#                                Table reader
+###############################################################################
+def repair_year_header(columns):
+    """
+    Fix duplicated year headers in a GCAM export (e.g. ..., 2085, 2090, 2085,
+    2100 where the second 2085 is 2095). A duplicated year is replaced by the
+    midpoint of its neighbours, or by continuing the step of the previous two
+    years at the end of the row. Empty trailing headers are kept as ''.
+    """
+    columns = [str(c).strip() for c in columns]
+    years = [i for i, c in enumerate(columns) if YEAR_PATTERN.match(c)]
+    seen = set()
+    for pos, i in enumerate(years):
+        if columns[i] not in seen:
+            seen.add(columns[i])
+            continue
+        prev = int(columns[years[pos - 1]]) if pos >= 1 else None
+        nxt = int(columns[years[pos + 1]]) if pos + 1 < len(years) else None
+        if prev is not None and nxt is not None:
+            fixed = (prev + nxt) // 2
+        elif prev is not None and pos >= 2:
+            fixed = 2 * prev - int(columns[years[pos - 2]])
+        else:
+            raise ValueError(f"cannot repair duplicated year column {columns[i]!r} in {columns}")
+        if str(fixed) in seen:
+            raise ValueError(f"cannot repair duplicated year column {columns[i]!r} in {columns}")
+        logger.warning(f"duplicated year column {columns[i]} read as {fixed}")
+        columns[i] = str(fixed)
+        seen.add(columns[i])
+    return columns
+
+def year_columns(df):
+    return [c for c in df.columns if YEAR_PATTERN.match(str(c))]
+
+@stage
+def read_gcam_table(file_path):
+    """
+    GCAM query export as Scenario/region/sector/input + one float column per
+    year. Handles CR, LF or CRLF line endings, duplicated year headers and the
+    empty trailing columns left by spreadsheet edits.
+    """
+    with open(file_path, newline='') as f:
+        header = next(csv.reader(f), [])
+    names = repair_year_header(header)
+    usecols = [i for i, c in enumerate(names) if c]
+    data = pd.read_csv(file_path, header=None, skiprows=1, names=range(len(names)),
+                       usecols=usecols, engine='c')
+    data.columns = [names[i] for i in usecols]
+    years = year_columns(data)
+    data[years] = data[years].apply(pd.to_numeric, errors='coerce').astype('float64')
+    return data.rename(columns={'Scenario': 'scenario'})
+
+###############################################################################
+#                              Electrification
+###############################################################################
+@stage
+def sector_sums(electricity, final_energy, aliases=REGION_ALIASES):
+    """
+    Long table scenario, region, sector, year, electricity, final_energy (EJ):
+    both exports summed over their inputs per region x sector in one grouped
+    aggregation each, aligned on the outer union of sectors. Sectors that only
+    consume electricity as an energy-system input (H2 production, refining)
+    have NaN final energy.
+    """
+    def summed(table, name):
+        table = table.assign(region=table['region'].replace(aliases))
+        wide = table.groupby(KEY_COLUMNS, sort=True)[year_columns(table)].sum()
+        wide.columns = wide.columns.astype('int64').rename('year')
+        return wide.stack().rename(name)
+
+    sums = pd.concat([summed(electricity, 'electricity'), summed(final_energy, 'final_energy')],
+                     axis=1, join='outer')
+    return sums.sort_index().reset_index()
+
+@stage
+def rates_from_sums(sums, level='region'):
+    """
+    Wide electrification-rate table, one column per year, from sector_sums.
+    level='region' sums every sector first (the layout of
+    Final_electrification_rate.csv); level='sector' keeps sectors.
+    """
+    keys = KEY_COLUMNS if level == 'sector' else ['scenario', 'region']
+    totals = sums.groupby(keys + ['year'], sort=True)[['electricity', 'final_energy']].sum(min_count=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = totals['electricity'] / totals['final_energy']
+    wide = rate.unstack('year')
+    wide.columns = wide.columns.astype(str)
+    wide.columns.name = None
+    return wide.reset_index()
+
+def load_sector_sums(electricity_path=ELECTRICITY_FILE, final_energy_path=FINAL_ENERGY_FILE,
+                     aliases=REGION_ALIASES, cache_dir=None, use_cache=True):
+    """
+    sector_sums for a pair of exports, served from the parquet cache when
+    neither file changed
+    """
+    def build():
+        return sector_sums(read_gcam_table(electricity_path), read_gcam_table(final_energy_path), aliases)
+
+    return cached_frame('sector_sums', [electricity_path, final_energy_path], build,
+                        cache_dir=cache_dir, use_cache=use_cache, aliases=aliases)
+
+def electrification_rates(electricity_path=ELECTRICITY_FILE, final_energy_path=FINAL_ENERGY_FILE,
+                          level='region', aliases=REGION_ALIASES, cache_dir=None, use_cache=True):
+    """
+    Electrification rate per scenario x region (x sector) x year, wide by year
+    """
+    sums = load_sector_sums(electricity_path, final_energy_path, aliases, cache_dir, use_cache)
+    return rates_from_sums(sums, level)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Electrification rates from GCAM sectoral exports")
+    parser.add_argument('--electricity', default=ELECTRICITY_FILE)
+    parser.add_argument('--final-energy', default=FINAL_ENERGY_FILE)
+    parser.add_argument('--level', choices=['region', 'sector'], default='region')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('-o', '--output', default='electrification_rate_derived.csv')
+    args = parser.parse_args()
+
+    rates = electrification_rates(args.electricity, args.final_energy, level=args.level,
+                                  use_cache=not args.no_cache)
+    rates.to_csv(args.output, index=False)
+    print(f"{len(rates)} rows -> {args.output}")
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from gcam_cache import cached_frame
+
+REGION_TO_COUNTRY_FILE = 'Region_to_Country.xlsx'
+
+
+def expand_region_mapping(region_to_country_df, region_column='GCAM Region', countries_column='Countries'):
+    """
+    One row per (region, country) from the 'Countries' lists of Region_to_Country.xlsx
+    """
+    mapping = region_to_country_df[[region_column, countries_column]].copy()
+    mapping[countries_column] = mapping[countries_column].str.split(', ')
+    mapping = mapping.explode(countries_column, ignore_index=True)
+    return mapping.rename(columns={region_column: 'region', countries_column: 'country'})
+
+
+@stage
+def load_region_mapping(file_path=REGION_TO_COUNTRY_FILE, cache_dir=None, use_cache=True):
+    """
+    Expanded (region, country) mapping of the workbook, parsed once and then
+    served from the parquet cache until the workbook changes
+    """
+    return cached_frame('region_mapping', [file_path],
+                        lambda: expand_region_mapping(pd.read_excel(file_path)),
+                        cache_dir=cache_dir, use_cache=use_cache)
+
+
+@stage
+def regions_to_countries(electrification_rate_df, country_mapping):
+    """
+    Copy every region's rows (all scenarios) to each of its countries with a
+    single merge. Row and column order match the original region/country loop.
+    """
+    rates = electrification_rate_df.rename(columns=lambda x: x.strip())
+    merged = country_mapping.merge(rates, on='region', how='inner')
+    columns = [c for c in rates.columns if c != 'region'] + ['country']
+    return merged[columns].reset_index(drop=True)
@@ -0,0 +1,184 @@
+# Columnar cache for ERCOT COP_HSL wind / solar workbooks.
+#
+# Each workbook is parsed with openpyxl once, typed, given the hour-ending
+# `datetime` column (DELIVERY_DATE + HOUR_ENDING) and written as an Arrow IPC
+# file next to a small JSON sidecar holding the source size, mtime and
+# SHA-256. Later reads memory-map the Arrow file instead of re-parsing XLSX.
+# A changed mtime triggers a re-hash; a changed hash rebuilds the entry.
+#
+#   python ercot_cache.py Texas_Wind_*.xlsx Texas_Solar_*.xlsx   # warm the cache
+
+import hashlib
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = '.ercot_cache'
+CACHE_VERSION = 1
+
+TEXT_COLUMNS = ['DSTFlag']
+
+###############################################################################
+#                              Workbook parsing
+###############################################################################
+@stage
+def parse_ercot_workbook(file_path):
+    """
+    Parse an ERCOT COP_HSL workbook into typed columns plus `datetime`.
+    Non-numeric cells in value columns (e.g. stray punctuation) become NaN.
+    """
+    data = pd.read_excel(file_path)
+    for col in data.columns:
+        if col == 'DELIVERY_DATE':
+            data[col] = pd.to_datetime(data[col])
+        elif col == 'HOUR_ENDING':
+            data[col] = pd.to_numeric(data[col]).astype('int64')
+        elif col in TEXT_COLUMNS:
+            data[col] = data[col].astype('string')
+        else:
+            data[col] = pd.to_numeric(data[col], errors='coerce').astype('float64')
+
+    data['datetime'] = pd.to_datetime(data['DELIVERY_DATE']) + \
+                       pd.to_timedelta(data['HOUR_ENDING'], unit='h')
+    return data
+
+###############################################################################
+#                                  Cache
+###############################################################################
+def _file_sha256(file_path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _cache_paths(file_path, cache_dir):
+    """
+    Arrow and sidecar paths of a workbook's entry, named after the file and
+    a hash of its resolved path so same-named workbooks from different
+    folders do not share an entry in a common cache_dir
+    """
+    file_path = Path(file_path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else file_path.parent / CACHE_DIR_NAME
+    stem = f'{file_path.name}.{hashlib.sha256(str(file_path.resolve()).encode()).hexdigest()[:12]}'
+    return cache_dir / f'{stem}.arrow', cache_dir / f'{stem}.json'
+
+def _read_sidecar(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_atomic(path, write):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    write(tmp)
+    os.replace(tmp, path)
+
+def _is_fresh(file_path, arrow_path, meta_path):
+    """
+    True when the cached entry matches the source; refreshes the recorded
+    mtime when only the mtime changed but the content did not
+    """
+    meta = _read_sidecar(meta_path)
+    if meta is None or meta.get('version') != CACHE_VERSION or not arrow_path.exists():
+        return False
+    if meta.get('source') != str(Path(file_path).resolve()):
+        return False
+    stat = os.stat(file_path)
+    if meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if meta['size'] != stat.st_size or meta['sha256'] != _file_sha256(file_path):
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta, indent=1)))
+    return True
+
+def build_cache_entry(file_path, cache_dir=None):
+    """
+    Parse the workbook and (re)write its Arrow cache entry
+    """
+    import pyarrow as pa
+
+    arrow_path, meta_path = _cache_paths(file_path, cache_dir)
+    arrow_path.parent.mkdir(parents=True, exist_ok=True)
+    stat = os.stat(file_path)
+    data = parse_ercot_workbook(file_path)
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    def write(path):
+        with pa.OSFile(str(path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    _write_atomic(arrow_path, write)
+    meta = {
+        'version': CACHE_VERSION,
+        'source': str(Path(file_path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': _file_sha256(file_path),
+        'rows': len(data),
+    }
+    _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta, indent=1)))
+    logger.info(f"cached {file_path} -> {arrow_path}")
+    return arrow_path
+
+@stage
+def read_ercot_workbook(file_path, cache_dir=None, use_cache=True):
+    """
+    ERCOT COP_HSL workbook with the hour-ending datetime column, served from
+    the memory-mapped Arrow cache (rebuilt when the source changed). Falls
+    back to parsing the workbook when pyarrow is not installed.
+    """
+    if use_cache:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            logger.warning(f"pyarrow not installed, parsing {file_path} without cache")
+            use_cache = False
+    if not use_cache:
+        return parse_ercot_workbook(file_path)
+
+    arrow_path, meta_path = _cache_paths(file_path, cache_dir)
+    if not _is_fresh(file_path, arrow_path, meta_path):
+        build_cache_entry(file_path, cache_dir)
+
+    with pa.memory_map(str(arrow_path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+def warm_cache(file_paths, cache_dir=None, workers=None):
+    """
+    Build missing or stale cache entries for many workbooks in parallel
+    """
+    stale = [f for f in file_paths if not _is_fresh(f, *_cache_paths(f, cache_dir))]
+    if not stale:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(build_cache_entry, stale, [cache_dir] * len(stale)))
+
+def read_ercot_workbooks(file_paths, cache_dir=None, workers=None):
+    """
+    Concatenate many cached workbooks (e.g. a year of daily COP_HSL files)
+    """
+    warm_cache(file_paths, cache_dir, workers)
+    frames = [read_ercot_workbook(f, cache_dir) for f in file_paths]
+    return pd.concat(frames, ignore_index=True).sort_values('datetime', ignore_index=True)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    built = warm_cache(sys.argv[1:])
+    print(f"{len(built)} of {len(sys.argv) - 1} workbooks (re)built")
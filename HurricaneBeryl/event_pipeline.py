@@ -0,0 +1,182 @@
+# Hurricane event pipeline: heat index at NOAA ISD stations and ERCOT
+# wind/solar maximum generation potential for one or many event windows.
+#
+#   result = run_events(KNOWN_EVENTS, ['72243612906.csv'],
+#                       'Texas_Wind_240708.xlsx', 'Texas_Solar_240708.xlsx',
+#                       workers=4)
+#
+# The result is a tidy frame with one value per row:
+#   event, station, datetime, variable, value
+# ERCOT system-wide series are reported under station 'ERCOT'. Station rows
+# also carry hour-ending aggregates (max heat index, mean temperature) on the
+# ERCOT hourly grid, so renewables and heat stress can be compared per hour.
+#
+# Each station file is decoded once for all the events that touch it, and
+# stations are spread over worker processes.
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from ercot_cache import read_ercot_workbook
+from heat_index import c2f_array, f2c_array, relative_humidity_array, heat_index_array
+from interval_join import join_hourly_weather
+from isd_reader import read_isd
+
+# (start_date, end_date), bounds inclusive as in the Beryl figure
+KNOWN_EVENTS = {
+    'Ike':    ('2008-09-11', '2008-09-21'),
+    'Harvey': ('2017-08-24', '2017-09-03'),
+    'Beryl':  ('2024-07-07', '2024-07-17'),
+}
+
+WEATHER_VARIABLES = ['TMP_F', 'DEW_F', 'RH', 'Heat_Index_F', 'Heat_Index_C', 'WND_SPEED']
+RENEWABLE_VARIABLES = ['COP_HSL_SYSTEM_WIDE_wind', 'COP_HSL_SYSTEM_WIDE_solar', 'total_output']
+# per ERCOT hour-ending interval, stamped like the ERCOT rows so they line up
+HOURLY_VARIABLES = ['Heat_Index_F_max', 'TMP_F_mean']
+
+TIDY_COLUMNS = ['event', 'station', 'datetime', 'variable', 'value']
+
+###############################################################################
+#                              ERCOT wind / solar
+###############################################################################
+def filter_window(df, column, start_date, end_date):
+    return df[(df[column] >= start_date) & (df[column] <= end_date)].copy()
+
+@stage
+def merge_renewables(wind_data, solar_data, start_date, end_date):
+    """
+    System-wide wind and solar COP_HSL in the window, joined on datetime
+    """
+    wind_filtered = filter_window(wind_data, 'datetime', start_date, end_date)
+    solar_filtered = filter_window(solar_data, 'datetime', start_date, end_date)
+
+    merged_data = pd.merge(
+        wind_filtered[['datetime', 'COP_HSL_SYSTEM_WIDE']],
+        solar_filtered[['datetime', 'COP_HSL_SYSTEM_WIDE']],
+        on='datetime',
+        suffixes=('_wind', '_solar')
+    )
+    merged_data['total_output'] = merged_data['COP_HSL_SYSTEM_WIDE_wind'] + merged_data['COP_HSL_SYSTEM_WIDE_solar']
+    return merged_data
+
+###############################################################################
+#                              NOAA heat index
+###############################################################################
+@stage
+def add_heat_index(noaa_data):
+    """
+    Add TMP_F, DEW_F, RH, Heat_Index_F and Heat_Index_C to decoded ISD rows
+    """
+    noaa_data['TMP_F'] = c2f_array(noaa_data['TMP_C'])
+    noaa_data['DEW_F'] = c2f_array(noaa_data['DEW_C'])
+    noaa_data['RH'] = relative_humidity_array(noaa_data['TMP_F'], noaa_data['DEW_F'])
+    noaa_data['Heat_Index_F'] = heat_index_array(noaa_data['TMP_F'], noaa_data['RH'])
+    noaa_data['Heat_Index_C'] = f2c_array(noaa_data['Heat_Index_F'])
+    return noaa_data
+
+def station_heat_index(file_path, start_date, end_date):
+    """
+    Heat index for one station file and one window
+    """
+    return add_heat_index(read_isd(file_path, start_date, end_date))
+
+def _station_id(noaa_data, file_path):
+    if 'STATION' in noaa_data and noaa_data['STATION'].notna().any():
+        return noaa_data['STATION'].dropna().iloc[0]
+    return Path(file_path).stem
+
+def _to_tidy(frame, time_column, variables, event, station):
+    long = frame.melt(id_vars=[time_column], value_vars=variables,
+                      var_name='variable', value_name='value')
+    long = long.rename(columns={time_column: 'datetime'})
+    long.insert(0, 'station', station)
+    long.insert(0, 'event', event)
+    return long[TIDY_COLUMNS]
+
+@stage
+def hourly_weather(noaa_data, start_date, end_date):
+    """
+    Hour-ending aggregates of the station reports over the window
+    """
+    hours = pd.DataFrame({'datetime': pd.date_range(start_date, end_date, freq='h')})
+    return join_hourly_weather(hours, noaa_data)
+
+@stage
+def _run_station(file_path, events):
+    """
+    Decode one station file once for all events and split it per event
+    """
+    noaa_data = add_heat_index(read_isd(file_path, windows=list(events.values())))
+    station = _station_id(noaa_data, file_path)
+    pieces = []
+    for event, (start_date, end_date) in events.items():
+        event_data = filter_window(noaa_data, 'DATE', start_date, end_date)
+        pieces.append(_to_tidy(event_data, 'DATE', WEATHER_VARIABLES, event, station))
+        hourly = hourly_weather(event_data, start_date, end_date)
+        pieces.append(_to_tidy(hourly, 'datetime', HOURLY_VARIABLES, event, station))
+    return pd.concat(pieces, ignore_index=True)
+
+###############################################################################
+#                                 Batch mode
+###############################################################################
+@stage
+def run_events(events, station_files, wind_file, solar_file, workers=None):
+    """
+    Tidy result frame for every event x station, plus the ERCOT renewables
+    of each event. events maps name -> (start_date, end_date). workers=1
+    runs in-process; otherwise stations are processed in a process pool.
+    """
+    wind_data = read_ercot_workbook(wind_file)
+    solar_data = read_ercot_workbook(solar_file)
+    pieces = []
+    for event, (start_date, end_date) in events.items():
+        merged_data = merge_renewables(wind_data, solar_data, start_date, end_date)
+        pieces.append(_to_tidy(merged_data, 'datetime', RENEWABLE_VARIABLES, event, 'ERCOT'))
+
+    if workers == 1 or len(station_files) <= 1:
+        pieces += [_run_station(f, events) for f in station_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pieces += list(pool.map(_run_station, station_files, [events] * len(station_files)))
+
+    result = pd.concat(pieces, ignore_index=True)
+    result['event'] = result['event'].astype('category')
+    result['variable'] = result['variable'].astype('category')
+    return result
+
+def run_event(start_date, end_date, station_files, wind_file, solar_file, name='event', workers=None):
+    """
+    Single-window convenience wrapper around run_events
+    """
+    return run_events({name: (start_date, end_date)}, station_files, wind_file, solar_file, workers=workers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Heat index / renewables batch run over hurricane events')
+    parser.add_argument('--station', nargs='+', required=True, help='ISD station CSV files')
+    parser.add_argument('--wind', required=True, help='ERCOT wind COP_HSL workbook')
+    parser.add_argument('--solar', required=True, help='ERCOT solar COP_HSL workbook')
+    parser.add_argument('--event', nargs='*', default=list(KNOWN_EVENTS),
+                        help='event names from KNOWN_EVENTS, or NAME:START:END')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='hurricane_events_result.csv')
+    args = parser.parse_args()
+
+    events = {}
+    for e in args.event:
+        if ':' in e:
+            name, start_date, end_date = e.split(':')
+            events[name] = (start_date, end_date)
+        else:
+            events[e] = KNOWN_EVENTS[e]
+
+    result = run_events(events, args.station, args.wind, args.solar, workers=args.workers)
+    result.to_csv(args.out, index=False)
+    print(result.groupby(['event', 'station', 'variable'], observed=True)['value'].describe())
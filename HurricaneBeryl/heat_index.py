@@ -0,0 +1,220 @@
+# Heat index and relative humidity for NOAA ISD temperature / dew point series.
+#
+# The scalar functions are the reference implementation used for the Beryl
+# figure. The *_array functions compute the same quantities on whole columns
+# and reproduce the scalar results bit for bit, including NaN handling.
+# pandas is not imported here: Series in give Series out, but plain arrays
+# and scalars do not pay for loading it.
+
+import math
+import sys
+
+import numpy as np
+
+###############################################################################
+#                      Scalar (row-wise) reference
+###############################################################################
+def _isnull(value):
+    return value is None or math.isnan(value)
+
+def c2f(c_temp):
+    """
+    from C to F
+    """
+    if _isnull(c_temp):
+        return np.nan
+    return (c_temp * 9.0 / 5.0) + 32.0
+
+def f2c(f_temp):
+    """
+    from F to c
+    """
+    if _isnull(f_temp):
+        return np.nan
+    return (f_temp - 32.0) * 5.0 / 9.0
+
+def calculate_relative_humidity(T_f, dew_point_f):
+
+    if _isnull(T_f) or _isnull(dew_point_f):
+        return np.nan
+
+    T_c = f2c(T_f)
+    dew_c = f2c(dew_point_f)
+    try:
+        e_s_T = math.exp((17.625 * T_c) / (243.04 + T_c))
+        e_s_dew = math.exp((17.625 * dew_c) / (243.04 + dew_c))
+        RH = 100.0 * (e_s_dew / e_s_T)
+    except OverflowError:
+        return np.nan
+
+    RH = max(0, min(100, RH))
+    return RH
+
+def calculate_heat_index(T_f, RH):
+    """
+    NWS Rothfusz regression
+    """
+    if _isnull(T_f) or _isnull(RH):
+        return np.nan
+
+    HI_simple = 0.5 * (
+        T_f + 61.0
+        + ((T_f - 68.0) * 1.2)
+        + (RH * 0.094)
+    )
+
+    if HI_simple < 80:
+        return HI_simple
+
+
+    HI_full = (
+        -42.379
+        + 2.04901523 * T_f
+        + 10.14333127 * RH
+        - 0.22475541 * T_f * RH
+        - 0.00683783 * (T_f ** 2)
+        - 0.05481717 * (RH ** 2)
+        + 0.00122874 * (T_f ** 2) * RH
+        + 0.00085282 * T_f * (RH ** 2)
+        - 0.00000199 * (T_f ** 2) * (RH ** 2)
+    )
+
+    if (RH < 13) and (80 <= T_f <= 112):
+        adjustment = ((13 - RH) / 4) * math.sqrt((17 - abs(T_f - 95)) / 17)
+        HI_full -= adjustment
+    elif (RH > 85) and (80 <= T_f <= 87):
+        adjustment = ((RH - 85) / 10) * ((87 - T_f) / 5)
+        HI_full += adjustment
+
+    return HI_full
+
+###############################################################################
+#                         Vectorized (array) engine
+###############################################################################
+def _as_float_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+def _like(result, template):
+    """
+    Return result as a Series when the input was a Series, else as ndarray
+    """
+    pd = sys.modules.get('pandas')   # a Series input means pandas is loaded
+    if pd is not None and isinstance(template, pd.Series):
+        return pd.Series(result, index=template.index, name=template.name)
+    return result
+
+def _unique_map(func, x):
+    """
+    Evaluate a scalar float function once per distinct non-NaN value of x and
+    broadcast the results back. OverflowError maps to inf.
+
+    This is a Python-level loop over the distinct values: cheap for ISD
+    readings (tenths of a degree, a few thousand values at most) but about
+    as slow as the scalar path for high-cardinality float input, e.g.
+    interpolated or model temperatures. Use exact=False there.
+    """
+    out = np.full(x.shape, np.nan)
+    valid = ~np.isnan(x)
+    uniq, inverse = np.unique(x[valid], return_inverse=True)
+    values = np.empty(uniq.shape)
+    for i, v in enumerate(uniq.tolist()):
+        try:
+            values[i] = func(v)
+        except OverflowError:
+            values[i] = np.inf
+    out[valid] = values[inverse]
+    return out
+
+def _exp(x, exact=True):
+    """
+    Elementwise exp. With exact=True math.exp is used, so results match the
+    scalar path bit for bit (np.exp may differ from libm in the last ulp).
+    ISD temperatures are reported in tenths of a degree, so the number of
+    distinct values is small.
+    """
+    if exact:
+        return _unique_map(math.exp, x)
+    with np.errstate(over='ignore'):
+        return np.exp(x)
+
+def _square(x, exact=True):
+    """
+    Elementwise x ** 2. Python's float ** 2 goes through libm pow, which does
+    not always round like numpy's x * x; exact=True follows the scalar path.
+    """
+    if exact:
+        return _unique_map(lambda v: v ** 2, x)
+    return x ** 2
+
+def c2f_array(c_temp):
+    """
+    from C to F, NaN stays NaN
+    """
+    c = _as_float_array(c_temp)
+    return _like((c * 9.0 / 5.0) + 32.0, c_temp)
+
+def f2c_array(f_temp):
+    """
+    from F to C, NaN stays NaN
+    """
+    f = _as_float_array(f_temp)
+    return _like((f - 32.0) * 5.0 / 9.0, f_temp)
+
+def relative_humidity_array(T_f, dew_point_f, exact=True):
+    """
+    Magnus relative humidity (%) from air and dew point temperature in F,
+    clipped to [0, 100]. NaN where either input is NaN or exp overflows.
+    """
+    T_c = (_as_float_array(T_f) - 32.0) * 5.0 / 9.0
+    dew_c = (_as_float_array(dew_point_f) - 32.0) * 5.0 / 9.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        e_s_T = _exp((17.625 * T_c) / (243.04 + T_c), exact=exact)
+        e_s_dew = _exp((17.625 * dew_c) / (243.04 + dew_c), exact=exact)
+        RH = 100.0 * (e_s_dew / e_s_T)
+
+    overflow = np.isinf(e_s_T) | np.isinf(e_s_dew)
+    missing = np.isnan(T_c) | np.isnan(dew_c)
+    RH = np.minimum(np.maximum(RH, 0.0), 100.0)
+    RH[overflow | missing] = np.nan
+    return _like(RH, T_f)
+
+def heat_index_array(T_f, RH, exact=True):
+    """
+    NWS Rothfusz regression on arrays, with the simple-formula branch below
+    80 F and the low-RH / high-RH adjustments. NaN where either input is NaN.
+    """
+    T = _as_float_array(T_f)
+    R = _as_float_array(RH)
+    T2 = _square(T, exact=exact)
+    R2 = _square(R, exact=exact)
+
+    HI_simple = 0.5 * (
+        T + 61.0
+        + ((T - 68.0) * 1.2)
+        + (R * 0.094)
+    )
+
+    HI_full = (
+        -42.379
+        + 2.04901523 * T
+        + 10.14333127 * R
+        - 0.22475541 * T * R
+        - 0.00683783 * T2
+        - 0.05481717 * R2
+        + 0.00122874 * T2 * R
+        + 0.00085282 * T * R2
+        - 0.00000199 * T2 * R2
+    )
+
+    low_rh = (R < 13) & (80 <= T) & (T <= 112)
+    high_rh = ~low_rh & (R > 85) & (80 <= T) & (T <= 87)
+
+    with np.errstate(invalid='ignore'):
+        low_adj = ((13 - R[low_rh]) / 4) * np.sqrt((17 - np.abs(T[low_rh] - 95)) / 17)
+    HI_full[low_rh] -= low_adj
+    HI_full[high_rh] += ((R[high_rh] - 85) / 10) * ((87 - T[high_rh]) / 5)
+
+    HI = np.where(HI_simple < 80, HI_simple, HI_full)
+    HI[np.isnan(T) | np.isnan(R)] = np.nan
+    return _like(HI, T_f)
@@ -0,0 +1,129 @@
+# Time-indexed joins between hourly ERCOT series and sub-hourly ISD reports.
+#
+# ERCOT values are hour-ending: the row stamped 14:00 covers (13:00, 14:00].
+# interval_aggregate assigns every observation to its interval with one
+# searchsorted over the sorted interval ends and reduces each interval with
+# ufunc.reduceat / bincount, so there is no Python loop over hours.
+# asof_join attaches the latest observation at or before each timestamp.
+
+import numpy as np
+import pandas as pd
+
+HOURLY_REPORT_TYPES = ('FM-15', 'FM-16')
+
+AGGREGATIONS = ('max', 'min', 'mean', 'sum', 'count')
+
+def _as_int64_times(values):
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def interval_index(obs_times, interval_ends, width='1h'):
+    """
+    Index into interval_ends (sorted, unique) of the (end - width, end]
+    interval holding each observation; -1 when it falls in no interval
+    """
+    ends = _as_int64_times(interval_ends)
+    t = _as_int64_times(obs_times)
+    if not len(ends):
+        return np.full(len(t), -1)
+    w = pd.Timedelta(width).value
+    k = np.searchsorted(ends, t, side='left')
+    inside = k < len(ends)
+    k_safe = np.minimum(k, len(ends) - 1)
+    inside &= t > ends[k_safe] - w
+    return np.where(inside, k, -1)
+
+def _reduce_sorted(values, segment, n, how):
+    """
+    Reduce values grouped by the non-decreasing segment ids into n slots,
+    ignoring NaN. Empty slots are NaN (0 for count).
+    """
+    valid = ~np.isnan(values)
+    if how == 'count':
+        return np.bincount(segment[valid], minlength=n).astype(np.float64)
+    if how in ('sum', 'mean'):
+        total = np.bincount(segment[valid], weights=values[valid], minlength=n)
+        count = np.bincount(segment[valid], minlength=n)
+        if how == 'sum':
+            return np.where(count > 0, total, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    ufunc, fill = {'max': (np.maximum, -np.inf), 'min': (np.minimum, np.inf)}[how]
+    out = np.full(n, np.nan)
+    if not len(segment):
+        return out
+    filled = np.where(valid, values, fill)
+    starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+    reduced = ufunc.reduceat(filled, starts)
+    reduced[np.isinf(reduced)] = np.nan
+    out[segment[starts]] = reduced
+    return out
+
+def interval_aggregate(interval_ends, obs_times, columns, width='1h'):
+    """
+    Aggregate observations per hour-ending interval in one pass.
+
+    columns maps output name -> (values, how), how in AGGREGATIONS. Returns
+    a frame indexed like interval_ends (duplicated ends, e.g. the repeated
+    DST hour, get the same values) with one column per output plus n_obs.
+    """
+    ends = pd.to_datetime(pd.Series(interval_ends)).reset_index(drop=True)
+    uniq, inverse = np.unique(ends.to_numpy(dtype='datetime64[ns]'), return_inverse=True)
+
+    t = pd.to_datetime(pd.Series(obs_times)).to_numpy(dtype='datetime64[ns]')
+    order = np.argsort(t, kind='stable')
+    k = interval_index(t[order], uniq, width)
+    keep = k >= 0
+    segment = k[keep]
+
+    out = {'n_obs': np.bincount(segment, minlength=len(uniq)).astype(np.int64)}
+    for name, (values, how) in columns.items():
+        if how not in AGGREGATIONS:
+            raise ValueError(f"unknown aggregation {how!r}, expected one of {AGGREGATIONS}")
+        v = np.asarray(values, dtype=np.float64)[order][keep]
+        out[name] = _reduce_sorted(v, segment, len(uniq), how)
+
+    return pd.DataFrame({name: col[inverse] for name, col in out.items()}, index=ends.index)
+
+def join_hourly_weather(hourly, noaa_data, aggregations=None, time_column='datetime',
+                        report_types=HOURLY_REPORT_TYPES, width='1h'):
+    """
+    Add per-interval weather aggregates (default: max heat index, mean air
+    temperature) to an hour-ending frame such as merged ERCOT wind/solar.
+    Only the routine FM-15 / FM-16 reports are used when REPORT_TYPE exists.
+    """
+    if aggregations is None:
+        aggregations = {'Heat_Index_F_max': ('Heat_Index_F', 'max'),
+                        'TMP_F_mean': ('TMP_F', 'mean')}
+    if report_types is not None and 'REPORT_TYPE' in noaa_data:
+        noaa_data = noaa_data[noaa_data['REPORT_TYPE'].isin(report_types)]
+
+    columns = {name: (noaa_data[col], how) for name, (col, how) in aggregations.items()}
+    agg = interval_aggregate(hourly[time_column], noaa_data['DATE'], columns, width)
+    agg.index = hourly.index
+    return pd.concat([hourly, agg], axis=1)
+
+def asof_join(left, right, columns, left_on='datetime', right_on='DATE', tolerance='1h'):
+    """
+    For each row of left, the values of the latest right row at or before
+    its timestamp and no older than tolerance (NaN otherwise)
+    """
+    out = left.copy()
+    if not len(right):   # e.g. an event window without ISD reports
+        for col in columns:
+            out[col] = np.nan
+        return out
+    lt = _as_int64_times(left[left_on])
+    order = np.argsort(_as_int64_times(right[right_on]), kind='stable')
+    rt = _as_int64_times(right[right_on])[order]
+
+    k = np.searchsorted(rt, lt, side='right') - 1
+    found = k >= 0
+    k_safe = np.maximum(k, 0)
+    if tolerance is not None:
+        found &= (lt - rt[k_safe]) <= pd.Timedelta(tolerance).value
+
+    for col in columns:
+        values = right[col].to_numpy()[order][k_safe]
+        out[col] = pd.Series(values, index=left.index).where(found)
+    return out
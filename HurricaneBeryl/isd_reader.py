@@ -0,0 +1,162 @@
+# Streaming reader for NOAA Global Hourly (ISD) CSV station files.
+#
+# Only the columns needed for the heat index / wind analysis are parsed, the
+# date window is applied to every chunk as soon as it is read, and the
+# fixed-width mandatory-section fields (TMP, DEW, WND) are decoded with byte
+# arithmetic instead of regex. Memory is bounded by the chunk size, so
+# multi-GB multi-station archives can be streamed.
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+ISD_COLUMNS = ['DATE', 'TMP', 'DEW', 'WND', 'REPORT_TYPE']
+OPTIONAL_COLUMNS = ['STATION']
+
+DEFAULT_CHUNKSIZE = 250_000
+
+###############################################################################
+#                    Fixed-width mandatory-section decoding
+###############################################################################
+def _as_bytes_matrix(column, width, fill):
+    """
+    View a string column as an (n, width) uint8 matrix. Missing entries are
+    replaced by fill, shorter strings are zero padded.
+    """
+    values = column.fillna(fill).to_numpy(dtype=str).astype(f'S{width}')
+    return values.view(np.uint8).reshape(len(values), width)
+
+def _digits(mat, start, stop):
+    """
+    Integer value of the ASCII digits mat[:, start:stop]; -1 where any
+    character is not a digit
+    """
+    d = mat[:, start:stop].astype(np.int64) - ord('0')
+    ok = ((d >= 0) & (d <= 9)).all(axis=1)
+    weights = 10 ** np.arange(stop - start - 1, -1, -1, dtype=np.int64)
+    return np.where(ok, d @ weights, -1)
+
+def decode_signed_field(column):
+    """
+    Decode ISD '+dddd,q' fields (TMP, DEW) into (value in tenths, qc code).
+    Malformed entries give NaN.
+    """
+    mat = _as_bytes_matrix(column, 7, '')
+    sign = mat[:, 0]
+    magnitude = _digits(mat, 1, 5)
+    ok = ((sign == ord('+')) | (sign == ord('-'))) & (mat[:, 5] == ord(',')) & (magnitude >= 0)
+    value = np.where(sign == ord('-'), -magnitude, magnitude).astype(np.float64)
+    value[~ok] = np.nan
+    qc = pd.Series(mat[:, 6].view('S1').astype(str), index=column.index)
+    return pd.Series(value, index=column.index), qc
+
+def decode_temperature_celsius(column):
+    """
+    TMP / DEW field to degrees C, with 999.9 (missing) and values outside
+    [-50, 55] set to NaN
+    """
+    tenths, _ = decode_signed_field(column)
+    temp = tenths / 10.0
+    return temp.where((temp != 999.9) & (temp <= 55) & (temp >= -50))
+
+def decode_wind(column):
+    """
+    WND field 'ddd,q,t,ssss,q' to direction (deg) and speed (m/s), NaN for
+    the 999 / 9999 missing codes
+    """
+    mat = _as_bytes_matrix(column, 14, '')
+    direction = _digits(mat, 0, 3).astype(np.float64)
+    speed = _digits(mat, 8, 12).astype(np.float64)
+    direction[(direction < 0) | (direction == 999)] = np.nan
+    speed[(speed < 0) | (speed == 9999)] = np.nan
+    return (pd.Series(direction, index=column.index),
+            pd.Series(speed / 10.0, index=column.index))
+
+###############################################################################
+#                              Chunked reader
+###############################################################################
+def _window_bounds(start_date, end_date):
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+    return start, end
+
+def _in_windows(values, windows, fmt=None):
+    """
+    Mask of values inside any (start, end) window, bounds inclusive. With fmt
+    the bounds are formatted as strings first.
+    """
+    keep = np.zeros(len(values), dtype=bool)
+    for start, end in windows:
+        inside = values.notna()
+        if start is not None:
+            inside &= values >= (start.strftime(fmt) if fmt else start)
+        if end is not None:
+            inside &= values <= (end.strftime(fmt) if fmt else end)
+        keep |= inside.to_numpy(dtype=bool)
+    return keep
+
+def _decode_chunk(chunk, windows):
+    # Cheap string prefilter on the calendar day (ISO dates sort
+    # lexicographically) before anything is converted.
+    day = chunk['DATE'].str.slice(0, 10)
+    chunk = chunk[_in_windows(day, windows, fmt='%Y-%m-%d')]
+
+    date = pd.to_datetime(chunk['DATE'], errors='coerce')
+    keep = _in_windows(date, windows)
+    chunk = chunk[keep]
+    date = date[keep]
+
+    out = pd.DataFrame({'DATE': date})
+    if 'STATION' in chunk:
+        out['STATION'] = chunk['STATION']
+    if 'REPORT_TYPE' in chunk:
+        out['REPORT_TYPE'] = chunk['REPORT_TYPE'].str.strip()
+    for col in ['TMP', 'DEW']:
+        if col in chunk:
+            out[f'{col}_C'] = decode_temperature_celsius(chunk[col])
+            out[f'{col}_QC'] = decode_signed_field(chunk[col])[1]
+    if 'WND' in chunk:
+        out['WND_DIR'], out['WND_SPEED'] = decode_wind(chunk['WND'])
+    return out
+
+def iter_isd_chunks(file_path, start_date=None, end_date=None,
+                    columns=ISD_COLUMNS, chunksize=DEFAULT_CHUNKSIZE, windows=None):
+    """
+    Yield decoded DataFrames of at most chunksize rows from an ISD CSV,
+    restricted to start_date <= DATE <= end_date, or to the union of the
+    (start, end) pairs in windows. STATION is kept when the file has it, so
+    concatenated multi-station archives can be split later.
+    """
+    if windows is None:
+        windows = [(start_date, end_date)]
+    windows = [_window_bounds(start, end) for start, end in windows]
+    wanted = set(columns) | set(OPTIONAL_COLUMNS)
+    reader = pd.read_csv(
+        file_path,
+        usecols=lambda c: c in wanted,
+        dtype=str,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            decoded = _decode_chunk(chunk, windows)
+            if len(decoded):
+                yield decoded
+
+@stage
+def read_isd(file_path, start_date=None, end_date=None,
+             columns=ISD_COLUMNS, chunksize=DEFAULT_CHUNKSIZE, windows=None):
+    """
+    Read an ISD CSV into one decoded DataFrame (only rows inside the window,
+    or inside any of windows)
+    """
+    chunks = list(iter_isd_chunks(file_path, start_date, end_date, columns, chunksize, windows))
+    if not chunks:
+        empty = pd.DataFrame({c: pd.Series(dtype=str) for c in columns})
+        return _decode_chunk(empty, [(None, None)])
+    return pd.concat(chunks, ignore_index=True)
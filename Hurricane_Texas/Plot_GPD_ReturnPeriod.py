@@ -1,108 +1,119 @@
+from pathlib import Path
+
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
-import matplotlib.patches as mpatches
-
-# read data
-df20_sc   = pd.read_csv("20th_scatter.csv")   
-df20_f    = pd.read_csv("20th_fit.csv")       
-
-df245_sc  = pd.read_csv("SSP245_scatter.csv")
-df245_f   = pd.read_csv("SSP245_fit.csv")     
-df245_bl  = pd.read_csv("SSP245_fill.csv")    
-
-df585_sc  = pd.read_csv("SSP585_scatter.csv")
-df585_f   = pd.read_csv("SSP585_fit.csv")
-df585_bl  = pd.read_csv("SSP585_fill.csv")
-
-c20  = '#06D6A0'
-c245 = '#118AB2'
-c585 = '#EF476F'
-
-# fig plot
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.set_xscale('log')
-ax.grid(True, which='major', color='grey',
-        linestyle='--', linewidth=0.6, alpha=0.7)
-ax.grid(True, which='minor', color='lightgrey',
-        linestyle='--', linewidth=0.3, alpha=0.5)
-
-# 20th
-ax.fill_between(
-    df20_f['return-period'],
-    df20_f['rp_up'],
-    df20_f['rp_low'],
-    color=c20, alpha=0.25, zorder=1
-)
-ax.scatter(
-    df20_sc['return-years'],
-    df20_sc['Max Surge (m)'],
-    facecolors='none', edgecolors=c20, s=15, zorder=2
-)
-ax.plot(
-    df20_f['return-period'],
-    df20_f['rp'],
-    color=c20, zorder=3
-)
-
-# SSP245 
-mask245 = df245_bl['return-period'] >= 2
-ax.fill_between(
-    df245_bl['return-period'][mask245],
-    df245_bl['lower'][mask245],
-    df245_bl['upper'][mask245],
-    color=c245, alpha=0.25, zorder=1
-)
-ax.scatter(
-    df245_sc['return-years'],
-    df245_sc['Max Surge (m)'],
-    facecolors='none', edgecolors=c245, s=15, zorder=2
-)
-ax.plot(
-    df245_f['return-period'],
-    df245_f['rp'],
-    color=c245, zorder=3
-)
-
-# SSP585
-mask585 = df585_bl['return-period'] >= 2
-ax.fill_between(
-    df585_bl['return-period'][mask585],
-    df585_bl['lower'][mask585],
-    df585_bl['upper'][mask585],
-    color=c585, alpha=0.25, zorder=1
-)
-ax.scatter(
-    df585_sc['return-years'],
-    df585_sc['Max Surge (m)'],
-    facecolors='none', edgecolors=c585, s=15, zorder=2
-)
-ax.plot(
-    df585_f['return-period'],
-    df585_f['rp'],
-    color=c585, zorder=3
-)
-
-# Legend
-legend_elements = [
-    Line2D([0], [0], color=c20,  marker='o', markersize=5,
-           label='Current climate', markerfacecolor='none'),
-    Line2D([0], [0], color=c245, marker='o', markersize=5,
-           label='SSP2-4.5 (median projection)', markerfacecolor='none'),
-    Line2D([0], [0], color=c585, marker='o', markersize=5,
-           label='SSP5-8.5 (median projection)', markerfacecolor='none'),
-    mpatches.Patch(color=c245, alpha=0.25,
-                   label='SSP2-4.5 uncertainty range'),
-    mpatches.Patch(color=c585, alpha=0.25,
-                   label='SSP5-8.5 uncertainty range'),
-]
-ax.legend(handles=legend_elements, loc='best')
-
-# Scale
-ax.set_xlim(1, 3000)
-ax.set_ylim(0, 125)
-ax.set_xlabel('Return Period (Years)')
-ax.set_ylabel('Storm intensity (m/s)')
-
-plt.tight_layout()
-plt.show()
+
+from gpd_curves import CURVES_FILE, adaptive_return_periods, curve_band, load_curves
+
+# inputs of the figure, relative to the data directory (figure build)
+INPUT_FILES = [CURVES_FILE, '20th_scatter.csv', 'SSP245_scatter.csv', 'SSP585_scatter.csv',
+               'SSP245_fill.csv', 'SSP585_fill.csv']
+
+STYLE = {
+    'figsize': (12, 6),
+    'colors': {'20th': '#06D6A0', 'SSP245': '#118AB2', 'SSP585': '#EF476F'},
+    'labels': {'20th': 'Current climate',
+               'SSP245': 'SSP2-4.5 (median projection)',
+               'SSP585': 'SSP5-8.5 (median projection)'},
+    'band_labels': {'SSP245': 'SSP2-4.5 uncertainty range',
+                    'SSP585': 'SSP5-8.5 uncertainty range'},
+    'xlim': (1, 3000),
+    'ylim': (0, 125),
+}
+
+###############################################################################
+#                                    Data
+###############################################################################
+def figure_data(data_dir='.'):
+    """
+    Storm samples, fitted curves and uncertainty bands per scenario. The 20th
+    century band is the bootstrap band of the fit; the SSP bands are read
+    from the *_fill.csv files.
+    """
+    data_dir = Path(data_dir)
+    # fitted GPD curves are stored as parameters and evaluated on an adaptive log grid
+    curves = load_curves(data_dir / CURVES_FILE)
+
+    def fit_curve(name, t_min=15, t_max=3000):
+        curve = curves[name]
+        return curve_band(curve, adaptive_return_periods(curve['params'], t_min, t_max))
+
+    data = {}
+    for name in ['20th', 'SSP245', 'SSP585']:
+        fit = fit_curve(name)
+        if name == '20th':
+            band = fit[['return-period']].assign(lower=fit['rp_low'], upper=fit['rp_up'])
+        else:
+            band = pd.read_csv(data_dir / f'{name}_fill.csv')
+            band = band[band['return-period'] >= 2]
+        data[name] = {'scatter': pd.read_csv(data_dir / f'{name}_scatter.csv'), 'fit': fit, 'band': band}
+    return data
+
+###############################################################################
+#                                   Figure
+###############################################################################
+def render(data, style=STYLE, output=None, dpi=600):
+    """
+    Return-period figure of figure_data(); saved to `output` when given
+    """
+    # plotting libraries are only loaded when a figure is drawn
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+    import matplotlib.patches as mpatches
+
+    fig, ax = plt.subplots(figsize=style['figsize'])
+    ax.set_xscale('log')
+    ax.grid(True, which='major', color='grey',
+            linestyle='--', linewidth=0.6, alpha=0.7)
+    ax.grid(True, which='minor', color='lightgrey',
+            linestyle='--', linewidth=0.3, alpha=0.5)
+
+    for name, scenario in data.items():
+        color = style['colors'][name]
+        ax.fill_between(
+            scenario['band']['return-period'],
+            scenario['band']['lower'],
+            scenario['band']['upper'],
+            color=color, alpha=0.25, zorder=1
+        )
+        ax.scatter(
+            scenario['scatter']['return-years'],
+            scenario['scatter']['Max Surge (m)'],
+            facecolors='none', edgecolors=color, s=15, zorder=2
+        )
+        ax.plot(
+            scenario['fit']['return-period'],
+            scenario['fit']['rp'],
+            color=color, zorder=3
+        )
+
+    # Legend
+    legend_elements = [
+        Line2D([0], [0], color=style['colors'][name], marker='o', markersize=5,
+               label=label, markerfacecolor='none')
+        for name, label in style['labels'].items()
+    ] + [
+        mpatches.Patch(color=style['colors'][name], alpha=0.25, label=label)
+        for name, label in style['band_labels'].items()
+    ]
+    ax.legend(handles=legend_elements, loc='best')
+
+    # Scale
+    ax.set_xlim(*style['xlim'])
+    ax.set_ylim(*style['ylim'])
+    ax.set_xlabel('Return Period (Years)')
+    ax.set_ylabel('Storm intensity (m/s)')
+
+    fig.tight_layout()
+    if output is not None:
+        fig.savefig(output, dpi=dpi)
+    return fig
+
+
+def main():
+    import matplotlib.pyplot as plt
+    render(figure_data())
+    plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# Return-level curves stored as GPD parameters instead of dense tables.
+#
+# A curve is (threshold, shape, scale, annual exceedance rate), the `params`
+# of gpd_engine, plus optional bootstrap parameter samples for its band.
+# Curves are kept in one compressed .npz and evaluated on demand: on an
+# adaptive log-spaced grid for plotting, or at exact return periods for any
+# number of curves at once.
+#
+# The published SSP central curves are kept as parameters in
+# GPD_published_params.csv (converted once from the paper's dense fit tables
+# with params_from_table); build applies them over the engine fits, so
+# GPD_curves.npz is regenerated from the scatter files and that table.
+#
+#   python gpd_curves.py build -o GPD_curves.npz                  # as stored in the repository
+#   python gpd_curves.py build --refit                            # engine fits only
+#   python gpd_curves.py build --table SSP245=SSP245_fit.csv ...  # convert dense fit tables
+#   python gpd_curves.py query GPD_curves.npz 100 500 1000
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from gpd_engine import BAND_PERCENTILES, fit_scenarios, read_scatter, return_levels
+
+logger = logging.getLogger(__name__)
+
+CURVES_FILE = 'GPD_curves.npz'
+PUBLISHED_FILE = 'GPD_published_params.csv'
+PARAM_COLUMNS = ['threshold', 'shape', 'scale', 'rate_u']
+SCENARIOS = ['20th', 'SSP245', 'SSP585']
+
+###############################################################################
+#                                  Storage
+###############################################################################
+def save_curves(file_path, curves):
+    """
+    curves: {name: {'params': (4,), 'bootstrap': (B, 4) or None}}; all
+    bootstrap arrays must have the same B
+    """
+    names = list(curves)
+    boots = [curves[n].get('bootstrap') for n in names]
+    n_boot = max((len(b) for b in boots if b is not None), default=0)
+    bootstrap = np.full((len(names), n_boot, 4), np.nan)
+    for i, b in enumerate(boots):
+        if b is not None:
+            bootstrap[i] = b
+    np.savez_compressed(file_path, names=np.array(names),
+                        params=np.array([curves[n]['params'] for n in names], dtype=np.float64),
+                        bootstrap=bootstrap)
+
+def load_curves(file_path=CURVES_FILE):
+    with np.load(file_path) as data:
+        curves = {}
+        for name, params, bootstrap in zip(data['names'], data['params'], data['bootstrap']):
+            has_boot = len(bootstrap) and not np.isnan(bootstrap).all()
+            curves[str(name)] = {'params': params, 'bootstrap': bootstrap if has_boot else None}
+        return curves
+
+def read_published(file_path=PUBLISHED_FILE):
+    """
+    {name: params} of the published central curves
+    """
+    table = pd.read_csv(file_path, float_precision='round_trip')
+    return {name: row.to_numpy(dtype=np.float64) for name, row in table.set_index('name')[PARAM_COLUMNS].iterrows()}
+
+def write_published(file_path, params):
+    """
+    Store {name: params} as the text table read by read_published
+    """
+    table = pd.DataFrame([params[n] for n in params], columns=PARAM_COLUMNS)
+    table.insert(0, 'name', list(params))
+    table.to_csv(file_path, index=False)
+
+def params_from_table(return_periods, levels, rate_u, iterations=100):
+    """
+    Parameters of a dense (return period, return level) table that follows
+    the Poisson-GPD form, keeping the exceedance rate rate_u. For a given
+    shape the curve is linear in location and scale, so the shape is found
+    by golden section on the least-squares residual.
+    """
+    p = -np.log1p(-1.0 / np.asarray(return_periods, dtype=np.float64))
+    levels = np.asarray(levels, dtype=np.float64)
+
+    def solve(shape):
+        growth = np.log(1.0 / p) if abs(shape) < 1e-12 else np.expm1(-shape * np.log(p)) / shape
+        design = np.column_stack([np.ones_like(p), growth])
+        coef, *_ = np.linalg.lstsq(design, levels, rcond=None)
+        return coef, np.sum((design @ coef - levels) ** 2)
+
+    lo, hi = -1.0, 1.0
+    golden = (np.sqrt(5.0) - 1.0) / 2.0
+    for _ in range(iterations):
+        a, b = hi - golden * (hi - lo), lo + golden * (hi - lo)
+        if solve(a)[1] < solve(b)[1]:
+            hi = b
+        else:
+            lo = a
+    shape = (lo + hi) / 2.0
+    (location, scale_p), residual = solve(shape)
+    # level = location + scale_p * growth(p); move rate_u out of the location
+    scale = scale_p * rate_u ** -shape
+    threshold = location - scale * (np.expm1(shape * np.log(rate_u)) / shape if abs(shape) > 1e-12
+                                    else np.log(rate_u))
+    logger.info(f"table converted, rms residual {np.sqrt(residual / len(p)):.2e}")
+    return np.array([threshold, shape, scale, rate_u])
+
+###############################################################################
+#                               Evaluation
+###############################################################################
+def adaptive_return_periods(params, t_min=1.0, t_max=3000.0, tol=0.02, initial=16, max_points=4096):
+    """
+    Log-spaced return periods refined where linear interpolation on a log
+    axis would be off by more than tol (m/s) for any of the parameter rows
+    """
+    x = np.linspace(np.log(t_min), np.log(t_max), initial)
+    while len(x) < max_points:
+        y = return_levels(params, np.exp(x))
+        mid = (x[:-1] + x[1:]) / 2.0
+        error = np.abs(return_levels(params, np.exp(mid)) - (y[:, :-1] + y[:, 1:]) / 2.0)
+        refine = np.nanmax(error, axis=0) > tol
+        if not refine.any():
+            break
+        x = np.sort(np.concatenate([x, mid[refine]]))
+    return np.exp(x)
+
+def curve_band(curve, return_periods, percentiles=BAND_PERCENTILES):
+    """
+    Return level and bootstrap band of one stored curve, columns
+    return-period, rp, rp_low, rp_up (band NaN without bootstrap samples)
+    """
+    frame = pd.DataFrame({'return-period': return_periods,
+                          'rp': return_levels(curve['params'], return_periods)[0]})
+    if curve['bootstrap'] is not None:
+        low, high = np.nanpercentile(return_levels(curve['bootstrap'], return_periods), percentiles, axis=0)
+    else:
+        low = high = np.full(len(frame), np.nan)
+    frame['rp_low'], frame['rp_up'] = low, high
+    return frame
+
+@stage
+def query(curves, return_periods, names=None, percentiles=BAND_PERCENTILES):
+    """
+    Return levels (and bands) of many curves at exact return periods, one
+    row per curve and period, evaluated in a single batch
+    """
+    names = list(curves) if names is None else list(names)
+    return_periods = np.atleast_1d(np.asarray(return_periods, dtype=np.float64))
+    params = np.array([curves[n]['params'] for n in names])
+    levels = return_levels(params, return_periods)
+
+    low = np.full_like(levels, np.nan)
+    high = np.full_like(levels, np.nan)
+    with_boot = [i for i, n in enumerate(names) if curves[n]['bootstrap'] is not None]
+    if with_boot:
+        boot = np.stack([curves[names[i]]['bootstrap'] for i in with_boot])
+        boot_levels = return_levels(boot.reshape(-1, 4), return_periods).reshape(len(with_boot), -1,
+                                                                                  len(return_periods))
+        low[with_boot], high[with_boot] = np.nanpercentile(boot_levels, percentiles, axis=1)
+
+    return pd.DataFrame({
+        'name': np.repeat(names, len(return_periods)),
+        'return-period': np.tile(return_periods, len(names)),
+        'level': levels.ravel(),
+        'low': low.ravel(),
+        'high': high.ravel(),
+    })
+
+###############################################################################
+#                                  Build
+###############################################################################
+@stage
+def build_curves(scatter_files, tables=None, published=None, n_boot=1000, workers=None):
+    """
+    Fit every scatter file with gpd_engine. Curves in `published` ({name:
+    params}, see read_published) or in `tables` ({name: dense fit CSV},
+    converted to parameters) keep that central curve, with the engine's
+    bootstrap samples for the band.
+    """
+    samples = {Path(f).stem.replace('_scatter', ''): read_scatter(f) for f in scatter_files}
+    fits = fit_scenarios(samples, n_boot=n_boot, workers=workers)
+    curves = {name: {'params': fit['params'], 'bootstrap': fit['bootstrap']} for name, fit in fits.items()}
+    for name, params in (published or {}).items():
+        curves[name]['params'] = np.asarray(params, dtype=np.float64)
+    for name, table_path in (tables or {}).items():
+        table = pd.read_csv(table_path)
+        curves[name]['params'] = params_from_table(table['return-period'], table['rp'],
+                                                   rate_u=curves[name]['params'][3])
+    return curves
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="GPD return-level curves stored as parameters")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build')
+    build.add_argument('scatter', nargs='*', default=[f'{s}_scatter.csv' for s in SCENARIOS])
+    build.add_argument('--published', default=PUBLISHED_FILE, help="central curve parameters to keep")
+    build.add_argument('--refit', action='store_true', help="ignore --published, keep the engine fits")
+    build.add_argument('--table', nargs='*', default=[], metavar='NAME=FIT_CSV')
+    build.add_argument('--write-published', default=None, metavar='PARAMS_CSV',
+                       help="also store the central parameters of the published / table curves")
+    build.add_argument('--n-boot', type=int, default=1000)
+    build.add_argument('-o', '--output', default=CURVES_FILE)
+    ask = sub.add_parser('query')
+    ask.add_argument('curves')
+    ask.add_argument('return_periods', nargs='+', type=float)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        tables = dict(t.split('=', 1) for t in args.table)
+        published = None if args.refit else read_published(args.published)
+        curves = build_curves(args.scatter, tables, published, args.n_boot)
+        save_curves(args.output, curves)
+        print(f"curves -> {args.output}")
+        if args.write_published:
+            names = [n for n in curves if n in (published or {}) or n in tables]
+            write_published(args.write_published, {n: curves[n]['params'] for n in names})
+            print(f"published parameters -> {args.write_published}")
+    else:
+        print(query(load_curves(args.curves), args.return_periods).to_string(index=False))
@@ -0,0 +1,213 @@
+# Return periods and peaks-over-threshold GPD fits of synthetic storm samples.
+#
+# The *_scatter.csv files hold one row per synthetic landfalling storm with
+# its intensity and empirical return period
+#
+#   T_i = 1 / (1 - exp(-rate * rank_i / (n + 1)))      rank 1 = strongest
+#
+# where rate is the annual storm frequency. Intensities above the 90th
+# percentile are fitted with a generalized Pareto distribution by maximum
+# likelihood, and return levels follow from the Poisson exceedance rate
+#
+#   x_T = u + scale / shape * ((rate_u / -log(1 - 1/T)) ** shape - 1)
+#
+# Bootstrap replicates are drawn as one (B, n) index array per chunk and
+# fitted together; chunks run in a process pool.
+#
+#   python gpd_engine.py 20th_scatter.csv SSP245_scatter.csv SSP585_scatter.csv
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+logger = logging.getLogger(__name__)
+
+RETURN_COLUMN = 'return-years'
+VALUE_COLUMN = 'Max Surge (m)'   # storm intensity (m/s) in the scatter files
+
+THRESHOLD_QUANTILE = 0.9
+N_BOOTSTRAP = 1000
+BAND_PERCENTILES = (5, 95)
+
+###############################################################################
+#                          Empirical return periods
+###############################################################################
+def empirical_return_periods(values, rate):
+    """
+    Return period (years) of each sample for `rate` storms per year, using
+    the Weibull plotting position rank / (n + 1)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rank = np.empty(len(values))
+    rank[np.argsort(-values, kind='stable')] = np.arange(1, len(values) + 1)
+    return 1.0 / -np.expm1(-rate * rank / (len(values) + 1))
+
+def annual_rate(return_years, values):
+    """
+    Annual storm frequency implied by a scatter file's return periods
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rank = np.empty(len(values))
+    rank[np.argsort(-values, kind='stable')] = np.arange(1, len(values) + 1)
+    rates = -np.log1p(-1.0 / np.asarray(return_years)) * (len(values) + 1) / rank
+    return float(np.median(rates))
+
+@stage
+def read_scatter(file_path):
+    """
+    Intensities and annual storm rate of a *_scatter.csv file
+    """
+    scatter = pd.read_csv(file_path)
+    values = scatter[VALUE_COLUMN].to_numpy(dtype=np.float64)
+    return values, annual_rate(scatter[RETURN_COLUMN], values)
+
+###############################################################################
+#                          Batched GPD maximum likelihood
+###############################################################################
+def _profile(theta, y):
+    """
+    Profile log-likelihood per exceedance of theta = shape / scale, with the
+    shape at its conditional MLE, mean(log(1 + theta * y)); theta (B, G), y (B, k)
+    """
+    shape = np.log1p(theta[..., None] * y[:, None, :]).mean(axis=-1)
+    return -(np.log(shape / theta) + shape + 1.0), shape
+
+def fit_gpd(y, grid=120, iterations=40):
+    """
+    GPD maximum-likelihood shape and scale for each row of exceedances y
+    (B, k). The profile likelihood in theta = shape / scale is scanned on a
+    grid for all rows at once and the best cell refined by golden section.
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    y_max = y.max(axis=1, keepdims=True)
+    # theta * y_max ranges over (-1, 100]; dense near the -1 support limit
+    t = -1.0 + np.exp(np.linspace(np.log(1e-6), np.log(101.0), grid))
+    t[np.abs(t) < 1e-9] = 1e-9
+    theta = t[None, :] / y_max
+    loglik, _ = _profile(theta, y)
+    best = np.nanargmax(loglik, axis=1)
+
+    rows = np.arange(len(y))
+    lo = theta[rows, np.maximum(best - 1, 0)]
+    hi = theta[rows, np.minimum(best + 1, grid - 1)]
+    golden = (np.sqrt(5.0) - 1.0) / 2.0
+    for _ in range(iterations):
+        a = hi - golden * (hi - lo)
+        b = lo + golden * (hi - lo)
+        la, _ = _profile(a[:, None], y)
+        lb, _ = _profile(b[:, None], y)
+        left = la[:, 0] > lb[:, 0]
+        hi = np.where(left, b, hi)
+        lo = np.where(left, lo, a)
+    theta_hat = (lo + hi) / 2.0
+    theta_hat[np.abs(theta_hat) < 1e-12] = 1e-12
+    _, shape = _profile(theta_hat[:, None], y)
+    shape = shape[:, 0]
+    return shape, shape / theta_hat
+
+def fit_pot(samples, rate, quantile=THRESHOLD_QUANTILE, n_exceed=None):
+    """
+    Peaks-over-threshold fit of each row of samples (B, n): threshold u at
+    the quantile, GPD on the n_exceed largest values (default: the count
+    above u in the first row). Returns an array (B, 4) of threshold, shape,
+    scale and annual exceedance rate.
+    """
+    samples = np.sort(np.atleast_2d(np.asarray(samples, dtype=np.float64)), axis=1)
+    n = samples.shape[1]
+    threshold = np.quantile(samples, quantile, axis=1)
+    if n_exceed is None:
+        n_exceed = int((samples[0] > threshold[0]).sum())
+    shape, scale = fit_gpd(samples[:, n - n_exceed:] - threshold[:, None])
+    rate_u = np.full(len(samples), rate * n_exceed / n)
+    return np.column_stack([threshold, shape, scale, rate_u])
+
+def return_levels(params, return_periods):
+    """
+    Return level for every parameter row (B, 4) and return period, (B, T)
+    """
+    params = np.atleast_2d(params)
+    threshold, shape, scale, rate_u = (params[:, i:i + 1] for i in range(4))
+    p = -np.log1p(-1.0 / np.asarray(return_periods, dtype=np.float64))[None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(np.abs(shape) < 1e-9, np.log(rate_u / p),
+                          np.expm1(shape * np.log(rate_u / p)) / shape)
+    return threshold + scale * growth
+
+###############################################################################
+#                                 Bootstrap
+###############################################################################
+def _bootstrap_chunk(values, rate, n, seed, quantile, n_exceed):
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(values), size=(n, len(values)))
+    return fit_pot(values[idx], rate, quantile, n_exceed)
+
+@stage
+def fit_scenarios(samples, n_boot=N_BOOTSTRAP, quantile=THRESHOLD_QUANTILE, seed=0,
+                  chunk=50, workers=None):
+    """
+    Point fit and bootstrap parameters for every scenario.
+
+    samples: {name: (values, annual rate)}, e.g. from read_scatter
+    Returns {name: {'values', 'rate', 'params' (4,), 'bootstrap' (n_boot, 4)}}.
+    The bootstrap chunks of all scenarios share one process pool; each
+    chunk has its own child seed, so results do not depend on workers.
+    seed may be an int or a SeedSequence.
+    """
+    fits, tasks = {}, []
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(samples))
+    for (name, (values, rate)), scenario_seed in zip(samples.items(), seeds):
+        values = np.asarray(values, dtype=np.float64)
+        params = fit_pot(values, rate, quantile)[0]
+        n_exceed = int((values > params[0]).sum())
+        fits[name] = {'values': values, 'rate': rate, 'params': params}
+        sizes = [min(chunk, n_boot - start) for start in range(0, n_boot, chunk)]
+        for size, chunk_seed in zip(sizes, scenario_seed.spawn(len(sizes))):
+            tasks.append((name, (values, rate, size, chunk_seed, quantile, n_exceed)))
+
+    if workers == 1:
+        results = [_bootstrap_chunk(*args) for _, args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_bootstrap_chunk, *zip(*[args for _, args in tasks])))
+    for name in fits:
+        fits[name]['bootstrap'] = np.concatenate([r for (n, _), r in zip(tasks, results) if n == name])
+    return fits
+
+def curve_frame(fit, return_periods, percentiles=BAND_PERCENTILES):
+    """
+    Fitted return levels and bootstrap band on a return-period grid, columns
+    return-period, rp, rp_low, rp_up
+    """
+    low, high = np.nanpercentile(return_levels(fit['bootstrap'], return_periods), percentiles, axis=0)
+    return pd.DataFrame({
+        'return-period': return_periods,
+        'rp': return_levels(fit['params'], return_periods)[0],
+        'rp_low': low,
+        'rp_up': high,
+    })
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="GPD return-level fits of storm scatter files")
+    parser.add_argument('scatter', nargs='+')
+    parser.add_argument('--n-boot', type=int, default=N_BOOTSTRAP)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    samples = {Path(f).stem.replace('_scatter', ''): read_scatter(f) for f in args.scatter}
+    fits = fit_scenarios(samples, n_boot=args.n_boot, workers=args.workers)
+    for name, fit in fits.items():
+        u, shape, scale, rate_u = fit['params']
+        print(f"{name}: u={u:.2f} shape={shape:.4f} scale={scale:.3f} rate_u={rate_u:.4f}")
+        print(curve_frame(fit, [10, 100, 500, 1000]).to_string(index=False))
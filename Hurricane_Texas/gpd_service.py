@@ -0,0 +1,193 @@
+# Return levels for many sites, GCMs and scenarios.
+#
+# Input is a long table of synthetic landfall intensities, one row per storm:
+#
+#   site, gcm, scenario, intensity, rate
+#
+# where rate is the annual storm frequency of that site / GCM / scenario
+# (constant within a group). Every group is one task: a GPD fit above the
+# 90th percentile plus bootstrap samples (gpd_engine). Tasks run in a process
+# pool and each result is cached in .gpd_cache/ under a hash of its samples
+# and settings, so adding a site or a GCM only fits the new groups. All
+# curves are then written to one parameter store (gpd_curves format) that
+# answers queries such as "100-year intensity at X under SSP5-8.5" without
+# refitting.
+#
+#   python gpd_service.py run samples.csv -o GPD_service.npz
+#   python gpd_service.py query GPD_service.npz Galveston SSP585 100 500
+#   python gpd_service.py run 20th_scatter.csv SSP245_scatter.csv SSP585_scatter.csv --scatter
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from gpd_curves import load_curves, query, save_curves
+from gpd_engine import BAND_PERCENTILES, N_BOOTSTRAP, THRESHOLD_QUANTILE, fit_scenarios, read_scatter
+
+logger = logging.getLogger(__name__)
+
+GCMS = ['CanESM5', 'CNRM-CM6-1', 'EC-Earth3', 'IPSL-CM6A-LR', 'MIROC6', 'UKESM1-0-LL']
+TASK_COLUMNS = ['site', 'gcm', 'scenario']
+
+CACHE_DIR_NAME = '.gpd_cache'
+CACHE_VERSION = 2
+SEPARATOR = '|'
+
+###############################################################################
+#                                   Inputs
+###############################################################################
+def samples_from_scatter(scatter_files, site='Galveston', gcm='ensemble'):
+    """
+    Long sample table from the pooled-ensemble *_scatter.csv files, one
+    scenario per file
+    """
+    frames = []
+    for file_path in scatter_files:
+        values, rate = read_scatter(file_path)
+        frames.append(pd.DataFrame({'site': site, 'gcm': gcm,
+                                    'scenario': Path(file_path).stem.replace('_scatter', ''),
+                                    'intensity': values, 'rate': rate}))
+    return pd.concat(frames, ignore_index=True)
+
+def curve_name(site, gcm, scenario):
+    return SEPARATOR.join([str(site), str(gcm), str(scenario)])
+
+###############################################################################
+#                                  Batch
+###############################################################################
+def _task_seed(seed, name):
+    """
+    Child of SeedSequence(seed) for one task, keyed on its curve name rather
+    than its position so that adding groups leaves the other seeds (and
+    their cache entries) unchanged
+    """
+    key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'little')
+    return np.random.SeedSequence(seed, spawn_key=(key,))
+
+def _task_key(values, rate, settings, task_seed):
+    h = hashlib.sha256()
+    h.update(json.dumps([CACHE_VERSION, float(rate), settings, list(task_seed.spawn_key)],
+                        sort_keys=True).encode())
+    h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return h.hexdigest()[:24]
+
+def _fit_task(values, rate, n_boot, quantile, seed):
+    fit = fit_scenarios({'task': (values, rate)}, n_boot=n_boot, quantile=quantile, seed=seed, workers=1)['task']
+    return fit['params'], fit['bootstrap']
+
+@stage
+def run_batch(samples, n_boot=N_BOOTSTRAP, quantile=THRESHOLD_QUANTILE, seed=0, workers=None,
+              cache_dir=CACHE_DIR_NAME, use_cache=True):
+    """
+    {curve_name(site, gcm, scenario): {'params', 'bootstrap'}} for every
+    group of the sample table. Cached groups are loaded, the others are
+    fitted in a process pool (workers=1 runs in-process). Every group
+    bootstraps from its own child seed, so equal-sized groups do not share
+    resamples.
+    """
+    settings = {'n_boot': n_boot, 'quantile': quantile, 'seed': seed}
+    cache_dir = Path(cache_dir)
+    if use_cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    curves, pending = {}, []
+    for (site, gcm, scenario), group in samples.groupby(TASK_COLUMNS, sort=True):
+        values = group['intensity'].to_numpy(dtype=np.float64)
+        rate = float(group['rate'].iloc[0])
+        name = curve_name(site, gcm, scenario)
+        task_seed = _task_seed(seed, name)
+        path = cache_dir / f'{_task_key(values, rate, settings, task_seed)}.npz'
+        if use_cache and path.exists():
+            with np.load(path) as data:
+                curves[name] = {'params': data['params'], 'bootstrap': data['bootstrap']}
+        else:
+            pending.append((name, path, values, rate, task_seed))
+    logger.info(f"{len(curves)} cached tasks, {len(pending)} to fit")
+
+    args = [[p[2] for p in pending], [p[3] for p in pending],
+            [n_boot] * len(pending), [quantile] * len(pending), [p[4] for p in pending]]
+    if workers == 1 or len(pending) <= 1:
+        _store_fits(curves, pending, map(_fit_task, *args), use_cache)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _store_fits(curves, pending, pool.map(_fit_task, *args), use_cache)
+    return dict(sorted(curves.items()))
+
+def _store_fits(curves, pending, results, use_cache):
+    for (name, path, *_), (params, bootstrap) in zip(pending, results):
+        curves[name] = {'params': params, 'bootstrap': bootstrap}
+        if use_cache:
+            tmp = path.with_name(f'.{path.stem}.{os.getpid()}.tmp.npz')
+            np.savez(tmp, params=params, bootstrap=bootstrap)
+            os.replace(tmp, path)
+
+###############################################################################
+#                                   Query
+###############################################################################
+@stage
+def query_return_level(curves, site, scenario, return_periods, gcm=None,
+                       percentiles=BAND_PERCENTILES):
+    """
+    Return level at `site` under `scenario` for each return period. With a
+    gcm, that model's level and bootstrap band; without, the median over
+    the site's GCMs and their min / max.
+    """
+    if gcm is not None:
+        result = query(curves, return_periods, [curve_name(site, gcm, scenario)], percentiles)
+        return result.drop(columns='name')
+
+    prefix, suffix = f'{site}{SEPARATOR}', f'{SEPARATOR}{scenario}'
+    names = [n for n in curves if n.startswith(prefix) and n.endswith(suffix)]
+    if not names:
+        raise KeyError(f"no curves for site {site!r} and scenario {scenario!r}")
+    levels = query(curves, return_periods, names, percentiles)
+    return (levels.groupby('return-period')['level']
+                  .agg(level='median', low='min', high='max', n_gcm='count')
+                  .reset_index())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Site x GCM x scenario return levels")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run')
+    run.add_argument('samples', nargs='+', help="long sample CSVs (site, gcm, scenario, intensity, rate)")
+    run.add_argument('--scatter', action='store_true', help="inputs are pooled *_scatter.csv files")
+    run.add_argument('--n-boot', type=int, default=N_BOOTSTRAP)
+    run.add_argument('--workers', type=int, default=None)
+    run.add_argument('--no-cache', action='store_true')
+    run.add_argument('-o', '--output', default='GPD_service.npz')
+    ask = sub.add_parser('query')
+    ask.add_argument('store')
+    ask.add_argument('site')
+    ask.add_argument('scenario')
+    ask.add_argument('return_periods', nargs='+', type=float)
+    ask.add_argument('--gcm', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        if args.scatter:
+            samples = samples_from_scatter(args.samples)
+        else:
+            samples = pd.concat([pd.read_csv(f) for f in args.samples], ignore_index=True)
+        curves = run_batch(samples, n_boot=args.n_boot, workers=args.workers, use_cache=not args.no_cache)
+        save_curves(args.output, curves)
+        print(f"{len(curves)} curves -> {args.output}")
+    else:
+        curves = load_curves(args.store)
+        t0 = time.perf_counter()
+        result = query_return_level(curves, args.site, args.scenario, args.return_periods, args.gcm)
+        print(result.to_string(index=False))
+        print(f"answered in {(time.perf_counter() - t0) * 1000:.1f} ms")
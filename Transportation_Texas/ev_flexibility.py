@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+N_VEHICLE_TX = 25796600  # Vehicle number in Texas  https://afdc.energy.gov/vehicle-registration
+ENERGY_EFS = 59.118 # TWh
+ENERGY_ALLEV = 78.645 #TWh
+
+PARTICIPATE = 0.1 # percentage of pariticpation
+L2_SHARE = 0.95 # share of level-2 chargers
+L2_KW = 7.2
+L1_KW = 1.4
+
+SUMMARY_STATS = ["mean", "min", "p5", "median", "p95", "max"]
+
+def number_of_evs(n_vehicle=N_VEHICLE_TX, energy_efs=ENERGY_EFS, energy_allev=ENERGY_ALLEV):
+    """
+    EV fleet size, int(N_vehicle * Energy_EFS / Energy_AllEV), broadcast over arrays
+    """
+    return np.floor(np.asarray(n_vehicle) * (np.asarray(energy_efs) / np.asarray(energy_allev)))
+
+def flexibility(bev_mw, bev_percent, participate=PARTICIPATE, l2_share=L2_SHARE,
+                l2_kw=L2_KW, l1_kw=L1_KW, n_ev=None):
+    """
+    BEV charging flexibility (MW) for an hourly BEV demand series.
+
+    num_charge   = vehicles charging = demand / mean charger power
+    num_nocharge = BEV fleet - num_charge
+    flex         = num_nocharge * L2 share * L2 power * participation
+    net_flex     = flex - demand
+
+    Every argument broadcasts with numpy rules, with hours on the last axis of
+    bev_mw, so a parameter grid can be evaluated in one call by giving the
+    parameters trailing length-1 axes, e.g. participate[:, None].
+    """
+    if n_ev is None:
+        n_ev = number_of_evs()
+    bev_mw = np.asarray(bev_mw, dtype=np.float64)
+    charger_kw = l2_share * l2_kw + (1 - l2_share) * l1_kw
+
+    num_charge = bev_mw * 1000 / charger_kw
+    num_nocharge = bev_percent * n_ev - num_charge
+    flex = num_nocharge * (l2_share * l2_kw / 1000) * participate
+    return {
+        "num_charge": num_charge,
+        "num_nocharge": num_nocharge,
+        "flex": flex,
+        "net_flex": flex - bev_mw,
+    }
+
+def _summarize(values):
+    p5, median, p95 = np.percentile(values, [5, 50, 95], axis=-1)
+    return {
+        "mean": values.mean(axis=-1),
+        "min": values.min(axis=-1),
+        "p5": p5,
+        "median": median,
+        "p95": p95,
+        "max": values.max(axis=-1),
+    }
+
+@stage
+def flexibility_sweep(bev_by_year, bev_percent, participate=PARTICIPATE, l2_share=L2_SHARE,
+                      n_vehicle=N_VEHICLE_TX, energy_efs=ENERGY_EFS, energy_allev=ENERGY_ALLEV,
+                      years=None, l2_kw=L2_KW, l1_kw=L1_KW, chunk=512):
+    """
+    Evaluate flexibility on the full grid years x participate x l2_share x
+    n_vehicle x energy_efs and return hourly summary statistics of flex and
+    net_flex, one row per combination.
+
+    bev_by_year: {year: hourly BEV demand (MW)} or a DataFrame with one
+        column per year; all years must have the same number of hours
+    bev_percent: scalar or {year: BEV/(BEV + PHEV) share}
+
+    The grid is flattened and evaluated chunk combinations at a time by
+    broadcasting parameters (chunk, 1) against the hourly series (chunk, H),
+    so memory stays bounded for sweeps of many thousands of settings.
+    """
+    if isinstance(bev_by_year, pd.DataFrame):
+        bev_by_year = {year: bev_by_year[year] for year in bev_by_year.columns}
+    if years is None:
+        years = list(bev_by_year)
+    series = np.vstack([np.asarray(bev_by_year[year], dtype=np.float64) for year in years])
+    if isinstance(bev_percent, dict):
+        share_by_year = np.array([bev_percent[year] for year in years], dtype=np.float64)
+    else:
+        share_by_year = np.full(len(years), float(bev_percent))
+
+    axes = [np.arange(len(years)), np.atleast_1d(participate), np.atleast_1d(l2_share),
+            np.atleast_1d(n_vehicle), np.atleast_1d(energy_efs)]
+    grid = [g.ravel() for g in np.meshgrid(*axes, indexing="ij")]
+    year_idx = grid[0].astype(np.int64)
+    n_ev = number_of_evs(grid[3], grid[4], energy_allev)
+
+    columns = {f"{name}_{stat}": np.empty(len(year_idx))
+               for name in ["flex", "net_flex"] for stat in SUMMARY_STATS}
+    for start in range(0, len(year_idx), chunk):
+        sl = slice(start, start + chunk)
+        idx = year_idx[sl]
+        result = flexibility(series[idx], share_by_year[idx][:, None],
+                             participate=grid[1][sl][:, None], l2_share=grid[2][sl][:, None],
+                             l2_kw=l2_kw, l1_kw=l1_kw, n_ev=n_ev[sl][:, None])
+        for name in ["flex", "net_flex"]:
+            for stat, values in _summarize(result[name]).items():
+                columns[f"{name}_{stat}"][sl] = values
+
+    params = pd.DataFrame({
+        "year": np.asarray(years, dtype=object)[year_idx],
+        "participate": grid[1],
+        "l2_share": grid[2],
+        "n_vehicle": grid[3],
+        "energy_efs": grid[4],
+        "n_ev": n_ev,
+    })
+    return pd.concat([params, pd.DataFrame(columns)], axis=1)
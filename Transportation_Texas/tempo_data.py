@@ -0,0 +1,196 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+logger = logging.getLogger(__name__)
+
+def is_partitioned(filepath):
+    for p in filepath.iterdir():
+        if p.is_dir() and ("=" in p.stem) and (len(p.stem.split("=")) == 2):
+            return True
+    return False
+
+def get_partitions(filepath):
+    assert is_partitioned(filepath), f"{filepath} is not partitioned"
+
+    partition_name = None
+    for p in filepath.iterdir():
+        if p.is_dir() and ("=" in p.stem):
+            tmp, value = p.stem.split("=")
+            if partition_name:
+                assert (tmp == partition_name), f"Found two different partition names in {filepath}: {partition_name}, {tmp}"
+            partition_name = tmp
+            yield partition_name, value, p
+
+def print_partitions(filepath, print_depth=2, _depth=0):
+    if is_partitioned(filepath):
+        space = ' ' * 4 * _depth
+        for partition_name, value, p in get_partitions(filepath):
+            print(f"{space}{partition_name}={value}")
+        if (not print_depth) or ((_depth + 1) < print_depth):
+            print_partitions(p, print_depth=print_depth, _depth=_depth+1)
+
+def get_metadata(dataset_path):
+    with open(dataset_path / "metadata.json") as f:
+        result = json.load(f)
+    return result
+
+def get_columns_by_type(metadata):
+    """
+    {dimension type: column name}, e.g. model_year -> tempo_project_model_years
+    """
+    return {dim_type: metadata["dimensions"][dim_type][0]["column_names"][0]
+            for dim_type in metadata["dimensions"] if metadata["dimensions"][dim_type]}
+
+def get_table_path(dataset_path):
+    filepath = dataset_path / "table.csv"
+    if not filepath.exists():
+        filepath = dataset_path / "table.parquet"
+    return filepath
+
+###############################################################################
+#                      Partition / predicate pushdown
+###############################################################################
+def _normalize_filters(filters, columns_by_type):
+    """
+    Filter keys may be dimension types (model_year, scenario, ...) or column
+    names; values may be scalars or lists. Returns {column: set of str}.
+    """
+    normalized = {}
+    for key, values in (filters or {}).items():
+        column = columns_by_type.get(key, key)
+        if isinstance(values, (str, int)) or not hasattr(values, "__iter__"):
+            values = [values]
+        normalized[column] = {str(v) for v in values}
+    return normalized
+
+def prune_partitions(filepath, filters):
+    """
+    Walk the hive-style name=value directories and yield only the data files
+    whose partition values pass filters ({column: set of str})
+    """
+    if filepath.is_file():
+        yield filepath
+        return
+    if not is_partitioned(filepath):
+        yield from sorted(p for p in filepath.rglob("*.parquet") if p.is_file())
+        return
+    for partition_name, value, p in get_partitions(filepath):
+        if partition_name in filters and value not in filters[partition_name]:
+            continue
+        yield from prune_partitions(p, filters)
+
+def _month_expression(ds, pc, time_column, months):
+    first, last = months
+    month = pc.month(ds.field(time_column))
+    return (month >= first) & (month <= last)
+
+def _iter_parquet(filepath, filters, columns, time_column, months, batch_size):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    files = [str(f) for f in prune_partitions(filepath, filters)]
+    logger.info(f"reading {len(files)} parquet files after partition pruning")
+    if not files:
+        return
+    dataset = ds.dataset(files, format="parquet", partitioning="hive",
+                         partition_base_dir=str(filepath) if filepath.is_dir() else None)
+
+    # Partition columns are already pruned by directory; the remaining
+    # filters go to the scanner so row groups are skipped on statistics.
+    expression = None
+    for column, values in filters.items():
+        field = dataset.schema.field(column)
+        condition = ds.field(column).isin(pa.array(sorted(values)).cast(field.type))
+        expression = condition if expression is None else expression & condition
+    if months is not None:
+        condition = _month_expression(ds, pc, time_column, months)
+        expression = condition if expression is None else expression & condition
+
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size,
+                                    batch_readahead=2, fragment_readahead=1):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def _iter_csv(filepath, filters, columns, columns_by_type, time_column, months, batch_size):
+    wanted = None
+    if columns is not None:
+        wanted = set(columns) | set(filters)
+        if months is not None:
+            wanted.add(time_column)
+    kwargs = {
+        "dtype": {columns_by_type["model_year"]: str},
+        "chunksize": batch_size,
+    }
+    if wanted is not None:
+        kwargs["usecols"] = lambda c: c in wanted
+    if time_column == "time_est" and (wanted is None or time_column in wanted):
+        kwargs["parse_dates"] = ["time_est"]
+
+    with pd.read_csv(filepath, **kwargs) as reader:
+        for chunk in reader:
+            keep = pd.Series(True, index=chunk.index)
+            for column, values in filters.items():
+                keep &= chunk[column].astype(str).isin(values)
+            if months is not None:
+                month = pd.to_datetime(chunk[time_column]).dt.month
+                keep &= month.between(*months)
+            chunk = chunk[keep]
+            if len(chunk):
+                yield chunk[columns] if columns is not None else chunk
+
+def iter_tempo(dataset_path, filters=None, months=None, columns=None, batch_size=1_000_000):
+    """
+    Stream the unpivoted TEMPO table as DataFrames of at most batch_size
+    rows, with the same filters / pushdown as load_tempo. Memory is bounded
+    by the batch size, not by the table size.
+    """
+    dataset_path = Path(dataset_path)
+    metadata = get_metadata(dataset_path)
+    assert metadata["table_format"]["format_type"] == "unpivoted", metadata["table_format"]
+    columns_by_type = get_columns_by_type(metadata)
+    time_column = columns_by_type["time"]
+    filters = _normalize_filters(filters, columns_by_type)
+    if columns is not None:
+        columns = [columns_by_type.get(c, c) for c in columns]
+
+    filepath = get_table_path(dataset_path)
+    if filepath.suffix == ".csv":
+        batches = _iter_csv(filepath, filters, columns, columns_by_type, time_column, months, batch_size)
+    else:
+        batches = _iter_parquet(filepath, filters, columns, time_column, months, batch_size)
+
+    for batch in batches:
+        if time_column in batch and not pd.api.types.is_datetime64_any_dtype(batch[time_column]):
+            batch[time_column] = pd.to_datetime(batch[time_column])
+        yield batch
+
+@stage
+def load_tempo(dataset_path, filters=None, months=None, columns=None, chunksize=1_000_000):
+    """
+    Load the unpivoted TEMPO table, reading only what passes the filters.
+
+    filters: {dimension type or column: value or list of values}, e.g.
+        {"state": "TX", "scenario": "efs_high_ldv", "model_year": [2030, 2050]}
+    months: inclusive (first, last) month range on the time column, e.g. (6, 11)
+    columns: columns to return (None for all)
+
+    Parquet tables use the hive-style name=value directories to skip whole
+    partitions and push the remaining predicates and the column list down to
+    the Parquet scanner. CSV tables are streamed in chunks and filtered chunk
+    by chunk, so only matching rows are kept in memory.
+    """
+    pieces = list(iter_tempo(dataset_path, filters, months, columns, chunksize))
+    if pieces:
+        df = pd.concat(pieces, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=columns)
+    logger.info(f"loaded {len(df)} rows with filters {filters} and months {months}")
+    return df
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+CATEGORICAL_COLUMNS = ["scenario", "state", "subsector"]
+
+def as_categorical(df, columns=CATEGORICAL_COLUMNS):
+    """
+    Convert low-cardinality dimension columns to category dtype in place
+    """
+    for col in columns:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+@stage
+def yearly_profiles(df, year_column="tempo_project_model_years", time_column="time_est",
+                    value_column="value"):
+    """
+    Hourly summed demand (MW) per model year in one grouped aggregation.
+    Returns the boxplot-ready long table with columns time_est, value, year.
+    """
+    summed = (df.groupby([year_column, time_column], observed=True, sort=True)[value_column]
+                .sum()
+                .reset_index())
+    summed = summed.rename(columns={year_column: "year"})
+    return summed[[time_column, value_column, "year"]]
+
+def powertrain(subsector):
+    """
+    'bev' if the subsector name contains 'bev', else 'phev'. The test runs
+    once per distinct subsector and is broadcast back to the rows.
+    """
+    codes, uniques = pd.factorize(subsector)
+    is_bev = np.array(["bev" in str(u) for u in uniques], dtype=bool)
+    label_codes = np.where(is_bev, 0, 1)
+    codes = np.where(codes >= 0, label_codes[codes] if len(uniques) else codes, -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=["bev", "phev"]),
+                     index=getattr(subsector, "index", None), name="type")
+
+@stage
+def powertrain_hourly(df, year_column="tempo_project_model_years", time_column="time_est",
+                      value_column="value"):
+    """
+    Hourly summed demand per model year split into bev / phev columns
+    """
+    hourly = (df.groupby([df[year_column], df[time_column], powertrain(df["subsector"])],
+                         observed=True, sort=True)[value_column]
+                .sum()
+                .unstack("type"))
+    hourly = hourly.reindex(columns=["bev", "phev"])
+    hourly.columns = hourly.columns.astype(str)
+    hourly.columns.name = None
+    return hourly.reset_index().rename(columns={year_column: "year"})
+
+@stage
+def daily_peaks(hourly, time_column="time_est", by=("year",)):
+    """
+    Daily maximum of hourly BEV and PHEV demand per model year (or per the
+    `by` columns) and the ratio bev / (bev + phev), for days where both are
+    present
+    """
+    keys = [hourly[c] for c in by] + [hourly[time_column].dt.date]
+    daily = (hourly.groupby(keys, observed=True, sort=True)[["bev", "phev"]]
+                   .max()
+                   .dropna()
+                   .rename(columns={"bev": "value_bev", "phev": "value_phev"})
+                   .reset_index())
+    daily["ratio"] = daily["value_bev"] / (daily["value_bev"] + daily["value_phev"])
+    return daily
+
+def bev_share_by_year(daily):
+    """
+    Mean daily-peak BEV share per model year, {year: BEV/(BEV + PHEV)}
+    """
+    return daily.groupby("year", observed=True)["ratio"].mean().to_dict()
@@ -0,0 +1,118 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stage_trace import stage
+
+from tempo_data import get_metadata, get_columns_by_type, iter_tempo
+from tempo_profiles import powertrain, daily_peaks
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB (NaN where unavailable)
+    """
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def _merge_partials(partials):
+    if len(partials) == 1:
+        return partials[0]
+    merged = pd.concat(partials)
+    return merged.groupby(level=list(range(merged.index.nlevels)), observed=True, sort=False).sum()
+
+@stage(rows=lambda result: result['rows'])
+def streaming_aggregates(dataset_path, filters=None, months=None, by=("scenario", "state"),
+                         batch_size=1_000_000, compact_every=8):
+    """
+    One streaming pass over the TEMPO table producing
+        annual_twh   annual energy (TWh) per scenario and model year
+        hourly       hourly summed demand (MW) per `by` x model year
+        daily_peaks  daily max BEV / PHEV demand and their ratio per `by` x model year
+        rows         number of rows streamed
+        peak_rss_mb  peak resident memory of the process
+
+    Each batch is reduced to additive partial sums keyed by `by`, model year,
+    hour and powertrain; partials are merged every compact_every batches, so
+    memory is bounded by the batch size plus the size of the aggregate, not
+    by the table. Daily peaks are taken after the merge because hourly sums
+    are only complete once every batch has been added.
+    """
+    metadata = get_metadata(Path(dataset_path))
+    columns_by_type = get_columns_by_type(metadata)
+    value_column = metadata["table_format"]["value_column"]
+    year_column = columns_by_type["model_year"]
+    time_column = columns_by_type["time"]
+    by = list(by)
+    keys = by + [year_column, time_column, "type"]
+    columns = list(dict.fromkeys(by + [year_column, time_column, "subsector", value_column]))
+
+    partials = []
+    rows = 0
+    for batch in iter_tempo(dataset_path, filters, months, columns, batch_size):
+        rows += len(batch)
+        batch["type"] = powertrain(batch["subsector"]).to_numpy()
+        batch[year_column] = batch[year_column].astype(str)
+        partials.append(batch.groupby(keys, observed=True, sort=False)[value_column].sum())
+        if len(partials) >= compact_every:
+            partials = [_merge_partials(partials)]
+        logger.info(f"streamed {rows} rows, peak RSS {peak_rss_mb():.0f} MB")
+
+    if not partials:
+        raise ValueError(f"no rows in {dataset_path} match filters {filters} and months {months}")
+    sums = _merge_partials(partials).rename(value_column)
+
+    hourly_by_type = (sums.unstack("type")
+                          .reindex(columns=["bev", "phev"])
+                          .rename_axis(columns=None)
+                          .reset_index()
+                          .rename(columns={year_column: "year"})
+                          .sort_values(by + ["year", time_column], ignore_index=True))
+    hourly = hourly_by_type[by + ["year", time_column]].copy()
+    hourly[value_column] = hourly_by_type["bev"].fillna(0.0) + hourly_by_type["phev"].fillna(0.0)
+
+    annual_keys = [c for c in ["scenario"] if c in by] + ["year"]
+    annual_twh = (hourly.groupby(annual_keys, observed=True)[value_column].sum() / 1.0E6).reset_index()
+    annual_twh = annual_twh.rename(columns={value_column: "annual_twh"})
+
+    peaks = daily_peaks(hourly_by_type, time_column=time_column, by=by + ["year"])
+
+    result = {
+        "annual_twh": annual_twh,
+        "hourly": hourly,
+        "daily_peaks": peaks,
+        "rows": rows,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    logger.info(f"aggregated {rows} rows into {len(hourly)} hourly rows, peak RSS {result['peak_rss_mb']:.0f} MB")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Out-of-core TEMPO aggregation")
+    parser.add_argument("dataset", type=Path, help="dataset directory with metadata.json")
+    parser.add_argument("--state", nargs="*", default=None)
+    parser.add_argument("--scenario", nargs="*", default=None)
+    parser.add_argument("--months", nargs=2, type=int, default=None, metavar=("FIRST", "LAST"))
+    parser.add_argument("--by", nargs="*", default=["scenario", "state"])
+    parser.add_argument("--batch-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    filters = {k: v for k, v in {"state": args.state, "scenario": args.scenario}.items() if v}
+    result = streaming_aggregates(args.dataset, filters=filters, months=args.months,
+                                  by=args.by, batch_size=args.batch_size)
+    print(result["annual_twh"])
+    print(result["hourly"].head())
+    print(result["daily_peaks"].groupby(args.by + ["year"], observed=True)["ratio"].mean())
+    print(f"rows streamed: {result['rows']}, peak RSS: {result['peak_rss_mb']:.0f} MB")
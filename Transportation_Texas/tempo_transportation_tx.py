@@ -1,276 +1,209 @@
-import datetime as dt
 import logging
-import json
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
+
+from tempo_data import get_metadata, get_columns_by_type, load_tempo
+from tempo_streaming import streaming_aggregates
+from tempo_profiles import (as_categorical, yearly_profiles, powertrain_hourly,
+                            daily_peaks, bev_share_by_year)
+from ev_flexibility import (N_VEHICLE_TX, ENERGY_EFS, ENERGY_ALLEV, PARTICIPATE,
+                            number_of_evs, flexibility, flexibility_sweep)
 
 
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
-data_dir = Path("./")
 dataset_name = "tempo_simple"
 
-def is_partitioned(filepath):
-    for p in filepath.iterdir():
-        if p.is_dir() and ("=" in p.stem) and (len(p.stem.split("=")) == 2):
-            return True
-    return False
-
-def get_partitions(filepath):
-    assert is_partitioned(filepath), f"{filepath} is not partitioned"
-    
-    partition_name = None
-    for p in filepath.iterdir():
-        if p.is_dir() and ("=" in p.stem):
-            tmp, value = p.stem.split("=")
-            if partition_name:
-                assert (tmp == partition_name), f"Found two different partition names in {filepath}: {partition_name}, {tmp}"
-            partition_name = tmp
-            yield partition_name, value, p
-
-def print_partitions(filepath, print_depth=2, _depth=0):
-    if is_partitioned(filepath):
-        space = ' ' * 4 * _depth
-        for partition_name, value, p in get_partitions(filepath):
-            print(f"{space}{partition_name}={value}")
-        if (not print_depth) or ((_depth + 1) < print_depth):
-            print_partitions(p, print_depth=print_depth, _depth=_depth+1)
-            
-def get_metadata(dataset_path):
-    with open(dataset_path / "metadata.json") as f:
-        result = json.load(f)
-    return result
-
-# load metadata and get column names by type
-metadata = get_metadata(data_dir / dataset_name)
-assert metadata["table_format"]["format_type"] == "unpivoted", metadata["table_format"]
-value_column = metadata["table_format"]["value_column"]
-columns_by_type = {dim_type: metadata["dimensions"][dim_type][0]["column_names"][0] 
-                   for dim_type in metadata["dimensions"] if metadata["dimensions"][dim_type]}
-
-# Load data table
-filepath = data_dir / dataset_name / "table.csv"
-if not filepath.exists():
-    filepath = data_dir / dataset_name / "table.parquet"
-
-if filepath.suffix == ".csv":
-    kwargs = { 
-        "dtype": { columns_by_type['model_year']: str }
-    }
-    if columns_by_type['time'] == "time_est": 
-        kwargs["parse_dates"] = ["time_est"]
-        
-    df = pd.read_csv(filepath, **kwargs) 
-else:  
-    df = pd.read_parquet(filepath)
-    
-logger.info(f"df.dtypes = \n{df.dtypes}")
-df.head(5)
-
-
-
-
-
-df2 = (df.groupby(["scenario", columns_by_type["model_year"]])[value_column].sum() / 1.0E6).reset_index()
-df2.rename({columns_by_type["model_year"]: "year", value_column: "annual_twh"}, axis=1, inplace=True)
-df2["scenario"] = df2["scenario"].map({
-    "efs_high_ldv": "EFS High Electrification",
-    "ldv_sales_evs_2035": "All LDV Sales EV by 2035",
-    "reference": "AEO Reference"
-})
-
-
-
-
-
-# State  Texas
-df_tx = df[df['state'] == 'TX']
-
-
-df_tx['time_est'] = pd.to_datetime(df_tx['time_est'])
-
-
-df_tx_july =  df_tx[df_tx['time_est'].dt.month.isin([6, 7, 8, 9, 10, 11])]
-#df_tx[(df_tx['time_est'].dt.month == 7) & (df_tx['tempo_project_model_years'] == 2050)]
-
-
-print(f"Filtered TX data:\n{df_tx.head()}")
-print(f"Filtered TX July data:\n{df_tx_july.head()}")
-
-
-
-# Select scenario as 'efs_high_ldv'
-df_tx_july_efs_high_ldv = df_tx_july[df_tx_july['scenario'] == 'efs_high_ldv' ]
-
-print(f"Filtered TX July data for efs_high_ldv scenario:\n{df_tx_july_efs_high_ldv.head()}")
-
-
-
-
-unique_years = df_tx_july_efs_high_ldv['tempo_project_model_years'].unique()
-
-
-yearly_dataframes = {}
-
-for year in unique_years:
-    df_year = df_tx_july_efs_high_ldv[df_tx_july_efs_high_ldv['tempo_project_model_years'] == year]
-    yearly_dataframes[f'df_{year}'] = df_year
-    print(f"Created DataFrame for the year {year} with {len(df_year)} rows.")
-
-
-
-df_2050 = yearly_dataframes['df_2050']
-print(df_2050.head())
-
-
-
-
-summed_yearly_dataframes = {}
-
-
-for year in unique_years:
-    df_year = df_tx_july_efs_high_ldv[df_tx_july_efs_high_ldv['tempo_project_model_years'] == year]
-    
-    
-    df_summed = df_year.groupby('time_est')['value'].sum().reset_index()
-    
-    summed_yearly_dataframes[f'summed_df_{year}'] = df_summed
-    
-    print(f"Created summed DataFrame for the year {year} with {len(df_summed)} rows.")
-
-summed_df_2050 = summed_yearly_dataframes['summed_df_2050']
-print(summed_df_2050.head())
-
-
-
-
-sns.set(style="ticks")
-
-all_years_df = pd.DataFrame()
-
-for year in unique_years:
-    key = f'summed_df_{year}'
-    if key in summed_yearly_dataframes:
-        df_summed = summed_yearly_dataframes[key]
-        df_summed['year'] = year  # Add a column for the year
-        all_years_df = pd.concat([all_years_df, df_summed], axis=0)
-    else:
-        print(f"Key {key} not found in summed_yearly_dataframes.")
-
-
-from matplotlib import rcParams
-
-rcParams.update({
-    'font.size': 16,          
-    'axes.labelsize': 20,     
-    'xtick.labelsize': 18,    
-    'ytick.labelsize': 18,    
-    'legend.fontsize': 18,    
-    'axes.titlesize': 20,     
-    'font.family': 'sans-serif',  
-    'font.sans-serif': ['Arial', 'Helvetica']  
-})
-
-if not all_years_df.empty:
-    plt.figure(figsize=(10, 8))
-    
-    ax = sns.boxplot(x='year', y='value', data=all_years_df, palette="viridis", showmeans=True, showfliers=False,
+# inputs of the figures, relative to the data directory (figure build)
+INPUT_FILES = [dataset_name]
+
+STYLE = {
+    'rcParams': {
+        'font.size': 16,
+        'axes.labelsize': 20,
+        'xtick.labelsize': 18,
+        'ytick.labelsize': 18,
+        'legend.fontsize': 18,
+        'axes.titlesize': 20,
+        'font.family': 'sans-serif',
+        'font.sans-serif': ['Arial', 'Helvetica']
+    },
+    'figsize': (10, 8),
+    'palette': 'viridis',
+    'flex_color': 'lightblue',
+    'flex_ylim': (8800, 11000),
+}
+
+###############################################################################
+#                                    Data
+###############################################################################
+def read_dataset(data_dir="./"):
+    """
+    Metadata column types and the Texas hurricane-season (June to November)
+    efs_high_ldv rows; only the matching partitions / rows are read
+    """
+    dataset = Path(data_dir) / dataset_name
+    metadata = get_metadata(dataset)
+    assert metadata["table_format"]["format_type"] == "unpivoted", metadata["table_format"]
+    columns_by_type = get_columns_by_type(metadata)
+    df_tx = load_tempo(dataset, filters={"state": "TX", "scenario": "efs_high_ldv"}, months=(6, 11))
+    as_categorical(df_tx)
+    return columns_by_type, df_tx
+
+def bev_2050(df_tx, year_column):
+    """
+    Hourly BEV demand of model year 2050 with its flexibility columns, and
+    the hourly BEV / PHEV table and daily peaks of every model year
+    """
+    # distinguish bev and phev (once per subsector) and sum per hour, every model year
+    powertrain_hourly_df = powertrain_hourly(df_tx, year_column=year_column)
+
+    # daily max of bev and phev, and bev_daily_max / (bev_daily_max + phev_daily_max)
+    daily_max = daily_peaks(powertrain_hourly_df)
+
+    hourly_2050 = powertrain_hourly_df[powertrain_hourly_df['year'].astype(str) == '2050']
+    df_2050_bev = hourly_2050[['time_est', 'bev']].dropna().rename(columns={'bev': 'value'}).reset_index(drop=True)
+
+    bev_percent = daily_max[daily_max['year'].astype(str) == '2050']['ratio'].mean()
+
+    N_EV = number_of_evs(N_VEHICLE_TX, ENERGY_EFS, ENERGY_ALLEV)
+
+    for name, values in flexibility(df_2050_bev['value'], bev_percent, participate=PARTICIPATE, n_ev=N_EV).items():
+        df_2050_bev[name] = values #net_flex = flex- value
+    return df_2050_bev, powertrain_hourly_df, daily_max, bev_percent
+
+def figure_data(data_dir="./"):
+    """
+    Hourly demand of every model year (boxplot) and the 2050 BEV flexibility
+    """
+    columns_by_type, df_tx = read_dataset(data_dir)
+    all_years_df = yearly_profiles(df_tx, year_column=columns_by_type["model_year"])
+    df_2050_bev = bev_2050(df_tx, columns_by_type["model_year"])[0]
+    return {'profiles': all_years_df[['year', 'value']], 'flex': df_2050_bev[['time_est', 'flex']]}
+
+###############################################################################
+#                                   Figures
+###############################################################################
+def _plotting(style):
+    """
+    pyplot and seaborn with the style applied; plotting libraries are only
+    loaded when a figure is drawn
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set(style="ticks")
+    plt.rcParams.update(style['rcParams'])
+    return plt, sns
+
+def render_charging_demand(data, style=STYLE, output=None, dpi=600):
+    """
+    Boxplot of hourly EV charging demand per model year during the hurricane
+    season; saved to `output` when given
+    """
+    all_years_df = data['profiles']
+    if all_years_df.empty:
+        print("No data to plot.")
+        return None
+    plt, sns = _plotting(style)
+    fig = plt.figure(figsize=style['figsize'])
+
+    ax = sns.boxplot(x='year', y='value', data=all_years_df, palette=style['palette'], showmeans=True, showfliers=False,
                      meanprops={"marker":"o", "markerfacecolor":"white", "markeredgecolor":"black", "markersize":"7"},
                      boxprops=dict(alpha=.7))
-    
+
     ax.set_xlabel('Year', fontsize=20, labelpad=10)
     ax.set_ylabel('EV charging demand (MW)', fontsize=20, labelpad=10)
-    
+
     ax.set_axisbelow(True)
     plt.xticks(rotation=45, fontsize=20)
     plt.yticks(fontsize=20)
-    
-    plt.tight_layout()
-    # Save the figure
-    #plt.savefig('EV_Charging_Demand_Hurricane_Season.png', dpi=600)
-
-    plt.show()
-else:
-    print("No data to plot.")
-
-
-
-#################################################################### flexibility
-
 
-# daily average
-average_demand_2050 = df_summed['value'].mean()
-
-# distinguish bev and phev
-df_2050['type'] = df_2050['subsector'].apply(lambda x: 'bev' if 'bev' in x else 'phev')
-
-#
-df_2050_bev = df_2050[df_2050['type'] == 'bev'].groupby('time_est')['value'].sum().reset_index()
-df_2050_phev = df_2050[df_2050['type'] == 'phev'].groupby('time_est')['value'].sum().reset_index()
-
-
-bev_daily_max = df_2050_bev.groupby(df_2050_bev['time_est'].dt.date)['value'].max().reset_index()
-phev_daily_max = df_2050_phev.groupby(df_2050_phev['time_est'].dt.date)['value'].max().reset_index()
-
-
-merged_daily_max = pd.merge(bev_daily_max, phev_daily_max, on='time_est', suffixes=('_bev', '_phev'))
-
-# bev_daily_max / (bev_daily_max + phev_daily_max)
-merged_daily_max['ratio'] = merged_daily_max['value_bev'] / (merged_daily_max['value_bev'] + merged_daily_max['value_phev'])
-
-
-bev_percent = merged_daily_max['ratio'].mean()
-
-print(f"BEV/(BEV + PHEV) : {bev_percent }")
-
-N_vehicle = 25796600  # Vehicle number in Texas  https://afdc.energy.gov/vehicle-registration
-Energy_EFS = 59.118 # TWh
-Energy_AllEV = 78.645 #TWh
-
-EV_percent = Energy_EFS/Energy_AllEV
-
-N_EV = int(N_vehicle*EV_percent)
-
-participate = 0.1 # percentage of pariticpation
-
-
-df_2050_bev['num_charge'] = ((df_2050_bev['value']*1000 / (0.95 * 7.2 + 0.05 * 1.4))) 
+    plt.tight_layout()
+    if output is not None:
+        fig.savefig(output, dpi=dpi)
+    return fig
 
-df_2050_bev['num_nocharge'] = (bev_percent * N_EV - (df_2050_bev['value']*1000 / (0.95 * 7.2 + 0.05 * 1.4))) 
+def render_flexibility(data, style=STYLE, output=None, dpi=600):
+    """
+    Boxplot of the hourly 2050 BEV potential flexibility; saved to `output`
+    when given
+    """
+    plt, sns = _plotting(style)
+    fig = plt.figure(figsize=style['figsize'])
+    sns.boxplot(data=data['flex']['flex'], color=style['flex_color'], linewidth=2.5, width=0.3)
 
-df_2050_bev['flex'] = (bev_percent * N_EV - (df_2050_bev['value']*1000 / (0.95 * 7.2 + 0.05 * 1.4)))  *  (0.95 * 0.0072) * participate
+    plt.ylim(*style['flex_ylim'])
 
-df_2050_bev['net_flex'] = df_2050_bev['flex'] - df_2050_bev['value']#net_flex = flex- value
+    plt.ylabel('Power (MW)', fontsize=20)
+    plt.xlabel('BEV Potential Flexibility', fontsize=20)
 
+    #plt.grid(True, linestyle='--', alpha=0.7)
+    plt.xticks([])
+    plt.yticks(fontsize=18)
 
+    plt.tight_layout()
+    if output is not None:
+        fig.savefig(output, dpi=dpi)
+    return fig
 
 
-sns.set_style("ticks")
+def main():
+    import matplotlib.pyplot as plt
+    logging.basicConfig(level=logging.INFO)
+    data_dir = Path("./")
 
+    # National annual totals, streamed batch by batch so the national table is never materialized
+    national = streaming_aggregates(data_dir / dataset_name, by=("scenario",))
+    logger.info(f"streamed {national['rows']} rows, peak RSS {national['peak_rss_mb']:.0f} MB")
 
-plt.figure(figsize=(10, 8))
-sns.boxplot(data=df_2050_bev['flex'], color='lightblue', linewidth=2.5, width=0.3)
+    annual_twh = national["annual_twh"]
+    annual_twh["scenario"] = annual_twh["scenario"].map({
+        "efs_high_ldv": "EFS High Electrification",
+        "ldv_sales_evs_2035": "All LDV Sales EV by 2035",
+        "reference": "AEO Reference"
+    })
+    logger.info(f"national annual demand (TWh) by scenario and model year:\n{annual_twh}")
 
+    # State  Texas, hurricane season (June to November), efs_high_ldv scenario.
+    columns_by_type, df_tx_july_efs_high_ldv = read_dataset(data_dir)
+    print(f"Filtered TX June-November data for efs_high_ldv scenario:\n{df_tx_july_efs_high_ldv.head()}")
 
-plt.ylim(8800, 11000)
+    # Hourly summed demand for every model year in one grouped aggregation
+    all_years_df = yearly_profiles(df_tx_july_efs_high_ldv, year_column=columns_by_type["model_year"])
+    print(all_years_df.groupby('year', observed=True).size().rename('rows'))
 
+    df_2050 = df_tx_july_efs_high_ldv[df_tx_july_efs_high_ldv['tempo_project_model_years'].astype(str) == '2050']
+    print(df_2050.head())
 
-plt.ylabel('Power (MW)', fontsize=20)
-plt.xlabel('BEV Potential Flexibility', fontsize=20)
+    summed_df_2050 = all_years_df[all_years_df['year'].astype(str) == '2050'][['time_est', 'value']]
+    print(summed_df_2050.head())
 
+    render_charging_demand({'profiles': all_years_df})
+    plt.show()
 
+    #################################################################### flexibility
 
+    # average hourly demand of the 2050 model year over the season
+    logger.info(f"2050 average hourly demand: {summed_df_2050['value'].mean():.1f} MW")
 
-#plt.grid(True, linestyle='--', alpha=0.7)
-plt.xticks([])
-plt.yticks(fontsize=18)
+    df_2050_bev, powertrain_hourly_df, daily_max, bev_percent = bev_2050(df_tx_july_efs_high_ldv,
+                                                                         columns_by_type["model_year"])
+    bev_percent_by_year = bev_share_by_year(daily_max)
+    print(f"BEV/(BEV + PHEV) by model year: {bev_percent_by_year}")
+    print(f"BEV/(BEV + PHEV) : {bev_percent }")
 
-plt.tight_layout()
-plt.show()
+    # Sensitivity sweep: model year x participation x charger mix x fleet size, evaluated in one pass
+    bev_by_year = powertrain_hourly_df.pivot(index='time_est', columns='year', values='bev').fillna(0)
+    flex_sweep = flexibility_sweep(bev_by_year, bev_percent_by_year,
+                                   participate=np.linspace(0.05, 0.5, 10),
+                                   l2_share=np.linspace(0.5, 1.0, 11),
+                                   n_vehicle=N_VEHICLE_TX * np.linspace(0.9, 1.3, 9))
+    print(f"Flexibility sweep ({len(flex_sweep)} settings):\n{flex_sweep.describe().T}")
 
+    render_flexibility({'flex': df_2050_bev})
+    plt.show()
 
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Area-proportion benchmark: the original per-CID filter / groupby / merge
+# (26 merges, the last 13 on WMO_Region, Name, Area) vs one masked matrix
+# normalized with a group transform.
+#
+# Run from the repository root:
+#   python benchmarks/bench_event_proportion.py --regions 100000
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "ClimateRisk_IPCCAR6"
+sys.path.insert(0, str(DATA))
+
+from climate_risk import calculate_event_proportion_all
+
+WMO_REGIONS = ['AFRICA_WMO', 'ASIA_WMO', 'SOUTH AMERICA', 'North America Central America and the Caribbean',
+               'SOUTH-WEST PACIFIC', 'EUROPE']
+
+
+def legacy_event_proportion_all(df):
+    extreme_event_columns = df.columns[df.columns.get_loc('ExtremeHeat'):]
+    proportions = {}
+    for event_column in extreme_event_columns:
+        relevant_df = df[df[event_column] != 'N'].copy()
+        if not relevant_df.empty:
+            region_area_sums = relevant_df.groupby('WMO_Region')['Area'].sum().reset_index()
+            region_area_sums.columns = ['WMO_Region', 'Total_Area_Affected']
+            relevant_df = relevant_df.merge(region_area_sums, on='WMO_Region', how='left')
+            relevant_df[f'{event_column}_Proportion'] = relevant_df['Area'] / relevant_df['Total_Area_Affected']
+            proportions[event_column] = relevant_df[['WMO_Region', 'Name', 'Area', f'{event_column}_Proportion']]
+    final_df = df[['WMO_Region', 'Name', 'Area']].copy()
+    for event_column, result in proportions.items():
+        final_df = final_df.merge(result, on=['WMO_Region', 'Name', 'Area'], how='left')
+    return final_df
+
+
+def synthetic_relevance(regions, not_relevant=0.6, seed=0):
+    """
+    RiskRelevance-shaped table for `regions` sub-national polygons: a WMO
+    region (a few without), an area and 'N' / empty for each CID of the
+    AR6 table
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(DATA / "RiskRelevance_240928_GDP.csv")
+    events = list(template.columns[template.columns.get_loc('ExtremeHeat'):])
+    wmo = np.array(WMO_REGIONS + [np.nan], dtype=object)[rng.choice(7, regions, p=[0.16] * 6 + [0.04])]
+    df = pd.DataFrame({
+        'WMO_Region': wmo,
+        'Name': [f'unit_{i:07d}' for i in range(regions)],
+        'Area': rng.lognormal(6, 1.5, regions),
+    })
+    relevance = np.where(rng.random((regions, len(events))) < not_relevant, 'N', None)
+    return pd.concat([df, pd.DataFrame(relevance, columns=events)], axis=1)
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = synthetic_relevance(args.regions)
+    legacy, t_legacy = timed(legacy_event_proportion_all, df)
+    fast, t_fast = timed(calculate_event_proportion_all, df)
+    pd.testing.assert_frame_equal(legacy, fast)
+
+    print(f"{args.regions:,d} regions x {df.shape[1] - 3} CIDs")
+    print(f"filter / groupby / 26 merges : {t_legacy:8.3f} s")
+    print(f"masked matrix + transform    : {t_fast:8.3f} s  ({t_legacy / t_fast:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
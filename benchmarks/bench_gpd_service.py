@@ -0,0 +1,102 @@
+# Site x GCM x scenario return-level service on synthetic storm samples:
+# intensities at each site are GPD-tailed draws whose scale grows with the
+# scenario, one group per site, CMIP6 GCM and scenario. Times the cold batch
+# (every task fitted in the process pool), the warm batch (all tasks from the
+# per-task cache) and single queries against the saved store.
+#
+# Run from the repository root:
+#   python benchmarks/bench_gpd_service.py --sites 20 --n-boot 200
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Hurricane_Texas"))
+
+from gpd_curves import load_curves, save_curves
+from gpd_service import GCMS, query_return_level, run_batch
+
+SCENARIOS = {'20th': 1.0, 'SSP245': 1.1, 'SSP585': 1.25}
+
+
+def synthetic_samples(n_sites, n_storms=800, seed=0):
+    """
+    Long sample table: per group, n_storms intensities of 30 m/s plus a
+    GPD(shape -0.1) excess and a storm rate around 2.5 per year
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for s in range(n_sites):
+        for gcm in GCMS:
+            for scenario, growth in SCENARIOS.items():
+                u = rng.random(n_storms)
+                excess = 12.0 * growth * ((1 - u) ** 0.1 - 1) / -0.1
+                frames.append(pd.DataFrame({'site': f'site{s:03d}', 'gcm': gcm, 'scenario': scenario,
+                                            'intensity': 30.0 + excess,
+                                            'rate': 2.5 * growth * rng.uniform(0.8, 1.2)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--storms", type=int, default=800)
+    parser.add_argument("--n-boot", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    samples = synthetic_samples(args.sites, args.storms)
+    n_tasks = args.sites * len(GCMS) * len(SCENARIOS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        t0 = time.perf_counter()
+        cold = run_batch(samples, n_boot=args.n_boot, workers=args.workers, cache_dir=cache_dir)
+        t_cold = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        warm = run_batch(samples, n_boot=args.n_boot, workers=args.workers, cache_dir=cache_dir)
+        t_warm = time.perf_counter() - t0
+        for name in cold:
+            assert np.array_equal(cold[name]['params'], warm[name]['params'])
+            assert np.array_equal(cold[name]['bootstrap'], warm[name]['bootstrap'])
+
+        store = os.path.join(tmp, "service.npz")
+        save_curves(store, warm)
+        t0 = time.perf_counter()
+        curves = load_curves(store)
+        t_load = time.perf_counter() - t0
+
+    periods = [10, 100, 500]
+    query_return_level(curves, 'site000', 'SSP585', periods)
+    t0 = time.perf_counter()
+    for s in range(args.sites):
+        single = query_return_level(curves, f'site{s:03d}', 'SSP585', periods, gcm=GCMS[0])
+    t_single = (time.perf_counter() - t0) / args.sites
+    t0 = time.perf_counter()
+    for s in range(args.sites):
+        ensemble = query_return_level(curves, f'site{s:03d}', 'SSP585', periods)
+    t_ensemble = (time.perf_counter() - t0) / args.sites
+
+    print(f"tasks: {n_tasks} ({args.sites} sites x {len(GCMS)} GCMs x {len(SCENARIOS)} scenarios), "
+          f"{args.storms} storms, {args.n_boot} bootstrap samples")
+    print(f"batch, cold cache: {t_cold:8.2f} s")
+    print(f"batch, warm cache: {t_warm:8.2f} s  ({t_cold / t_warm:.0f}x)")
+    print(f"store load:        {t_load * 1000:8.1f} ms")
+    print(f"query, one GCM:    {t_single * 1000:8.2f} ms")
+    print(f"query, ensemble:   {t_ensemble * 1000:8.2f} ms")
+    print(single.to_string(index=False))
+    print(ensemble.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
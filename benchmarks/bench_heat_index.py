@@ -0,0 +1,89 @@
+# Heat index benchmark: row-wise DataFrame.apply vs the array engine.
+#
+# Run from the repository root:
+#   python benchmarks/bench_heat_index.py [--rows 1000000]
+#
+# The station-year 72243612906.csv is tiled up to the requested row count so
+# the temperature distribution matches real ISD data.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "HurricaneBeryl"))
+
+from heat_index import (c2f, f2c, calculate_relative_humidity, calculate_heat_index,
+                        c2f_array, f2c_array, relative_humidity_array, heat_index_array)
+
+
+def load_station_temperatures(rows):
+    noaa = pd.read_csv(ROOT / "HurricaneBeryl" / "72243612906.csv",
+                       usecols=["TMP", "DEW"], dtype=str)
+    out = {}
+    for col in ["TMP", "DEW"]:
+        temp = pd.to_numeric(noaa[col].str.extract(r'([\+\-]?\d+)', expand=False),
+                             errors='coerce') / 10.0
+        out[col] = temp.where((temp != 999.9) & (temp <= 55) & (temp >= -50))
+    df = pd.DataFrame(out)
+    reps = -(-rows // len(df))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:rows]
+
+
+def run_rowwise(df):
+    out = pd.DataFrame(index=df.index)
+    out['TMP_F'] = df['TMP'].apply(c2f)
+    out['DEW_F'] = df['DEW'].apply(c2f)
+    out['RH'] = out.apply(lambda row: calculate_relative_humidity(row['TMP_F'], row['DEW_F']), axis=1)
+    out['HI_F'] = out.apply(lambda row: calculate_heat_index(row['TMP_F'], row['RH']), axis=1)
+    out['HI_C'] = out['HI_F'].apply(f2c)
+    return out
+
+
+def run_vectorized(df):
+    out = pd.DataFrame(index=df.index)
+    out['TMP_F'] = c2f_array(df['TMP'])
+    out['DEW_F'] = c2f_array(df['DEW'])
+    out['RH'] = relative_humidity_array(out['TMP_F'], out['DEW_F'])
+    out['HI_F'] = heat_index_array(out['TMP_F'], out['RH'])
+    out['HI_C'] = f2c_array(out['HI_F'])
+    return out
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heat index: row-wise DataFrame.apply vs the array engine")
+    parser.add_argument("--rows", type=int, default=200_000,
+                        help="rows for the vectorized engine")
+    parser.add_argument("--rowwise-rows", type=int, default=50_000,
+                        help="rows for the row-wise apply baseline (it is slow)")
+    args = parser.parse_args()
+
+    df_small = load_station_temperatures(args.rowwise_rows)
+    ref, t_row = timed(run_rowwise, df_small)
+    vec, t_vec_small = timed(run_vectorized, df_small)
+    for col in ref.columns:
+        a = ref[col].to_numpy(dtype=float)
+        b = vec[col].to_numpy(dtype=float)
+        assert np.array_equal(a, b, equal_nan=True), f"{col} differs from the scalar reference"
+
+    df_large = load_station_temperatures(args.rows)
+    _, t_vec = timed(run_vectorized, df_large)
+
+    print(f"row-wise apply : {len(df_small):>10,d} rows  {t_row:8.3f} s  {len(df_small) / t_row:>14,.0f} rows/s")
+    print(f"vectorized     : {len(df_small):>10,d} rows  {t_vec_small:8.3f} s  {len(df_small) / t_vec_small:>14,.0f} rows/s")
+    print(f"vectorized     : {len(df_large):>10,d} rows  {t_vec:8.3f} s  {len(df_large) / t_vec:>14,.0f} rows/s")
+    print("results identical to the scalar reference (bit for bit, NaN included)")
+
+
+if __name__ == "__main__":
+    main()
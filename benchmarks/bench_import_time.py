@@ -0,0 +1,98 @@
+# Import-time budget of the analysis modules: each module is imported in a
+# fresh interpreter with `python -X importtime` from its own directory, and
+# the cumulative import time and the heavy libraries it loaded are reported.
+#
+# Each module is measured against the one third-party package it needs at
+# import time (pandas, or numpy alone), timed in the same run, so the budget
+# is that package plus a small allowance for the module's own code rather
+# than an absolute figure that depends on the machine. A module fails when
+# it exceeds its budget, loads a plotting library, or loads pandas although
+# its base is numpy; the script exits non-zero then.
+#
+# Run from the repository root:
+#   python benchmarks/bench_import_time.py --allowance-ms 150 --repeat 5
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# (directory, module, base package) imported for their compute functions
+MODULES = [
+    ('GCAM', 'Python_GCAM_regiontocountry', 'pandas'),
+    ('GCAM', 'gcam_batch', 'pandas'),
+    ('ClimateRisk_IPCCAR6', 'Quantifyclimaterisk_GDP_PPP_total', 'pandas'),
+    ('ClimateRisk_IPCCAR6', 'risk_pipeline', 'pandas'),
+    ('Hurricane_Texas', 'Plot_GPD_ReturnPeriod', 'pandas'),
+    ('Hurricane_Texas', 'gpd_service', 'pandas'),
+    ('HurricaneBeryl', 'Plot_WindSolar_HeatIndex', 'pandas'),
+    ('HurricaneBeryl', 'heat_index', 'numpy'),
+    ('Transportation_Texas', 'tempo_transportation_tx', 'pandas'),
+    ('Transportation_Texas', 'tempo_profiles', 'pandas'),
+]
+PLOTTING = ('matplotlib', 'seaborn')
+# libraries a module with this base must not load
+EXCLUDED = {'pandas': PLOTTING, 'numpy': PLOTTING + ('pandas', 'scipy')}
+
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_time(directory, module):
+    """
+    Cumulative import time (ms) of `module` and the top-level packages it
+    pulled in, from one `python -X importtime -c "import module"`
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT / directory, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total, packages = None, set()
+    for match in LINE.finditer(proc.stderr):
+        name = match.group(4)
+        packages.add(name.split('.')[0])
+        if name == module:
+            total = int(match.group(2)) / 1000
+    return total, packages
+
+
+def median_import_time(directory, module, repeat):
+    runs = [import_time(directory, module) for _ in range(repeat)]
+    return statistics.median(t for t, _ in runs), runs[0][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the analysis modules against their base package")
+    parser.add_argument("--allowance-ms", type=float, default=150.0,
+                        help="import time allowed on top of the module's base package")
+    parser.add_argument("--repeat", type=int, default=3, help="imports per module, the median is reported")
+    args = parser.parse_args()
+
+    # warm the bytecode and OS file caches
+    for directory, module, _ in MODULES:
+        import_time(directory, module)
+
+    bases = {base: median_import_time('.', base, args.repeat)[0] for base in EXCLUDED}
+    for base, ms in bases.items():
+        print(f"{base:52s} {ms:10.1f}")
+
+    failures = []
+    print(f"{'module':52s} {'median ms':>10s} {'budget ms':>10s}  excluded libraries loaded")
+    for directory, module, base in MODULES:
+        median, packages = median_import_time(directory, module, args.repeat)
+        budget = bases[base] + args.allowance_ms
+        loaded = sorted(set(EXCLUDED[base]) & packages)
+        print(f"{directory + '/' + module:52s} {median:10.1f} {budget:10.1f}  {', '.join(loaded) or '-'}")
+        if median > budget or loaded:
+            failures.append(module)
+
+    print(f"base + {args.allowance_ms:.0f} ms: "
+          + (f"over budget or excluded libraries loaded: {failures}" if failures else "ok"))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
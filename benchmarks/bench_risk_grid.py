@@ -0,0 +1,81 @@
+# Gridded climate-risk benchmark on a synthetic global 0.25 degree grid
+# (720 x 1440 cells). Land cells are assigned to the 58 AR6 regions in
+# contiguous blocks; with each region's GDP split over its cells the cell
+# risk must equal the region-level TotalRiskbyGDP of Step 5.
+#
+# Run from the repository root:
+#   python benchmarks/bench_risk_grid.py --resolution 0.25
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "ClimateRisk_IPCCAR6"
+sys.path.insert(0, str(DATA))
+
+from risk_grid import global_grid, grid_arrays, grid_risk, read_risk_grid, save_risk_grid
+from risk_pipeline import run_pipeline
+
+
+def synthetic_region_grid(n_regions, resolution=0.25, land_fraction=0.3, seed=0):
+    """
+    Region index grid: a random land mask, land cells in row-major order
+    split into n_regions contiguous blocks of random size
+    """
+    rng = np.random.default_rng(seed)
+    lat, lon = global_grid(resolution)
+    land = rng.random((len(lat), len(lon))) < land_fraction
+    sizes = rng.dirichlet(np.ones(n_regions)) * land.sum()
+    bounds = np.minimum(np.cumsum(np.maximum(sizes.astype(np.int64), 1)), land.sum())
+    region_index = np.full(land.shape, -1, dtype=np.int16)
+    region_index[land] = np.searchsorted(bounds, np.arange(land.sum()), side='right').clip(0, n_regions - 1)
+    return region_index, lat, lon
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resolution", type=float, default=0.25)
+    parser.add_argument("--chunk", type=int, default=1 << 18)
+    args = parser.parse_args()
+
+    relevance = pd.read_csv(DATA / "RiskRelevance_240928_GDP.csv")
+    loss_mapping = pd.read_csv(DATA / "WMO_LossData_mapping.csv")
+    ipcc = pd.read_csv(DATA / "IPCC_ClimateRiskv3_revisegdp_240927v2.csv")
+    arrays = grid_arrays(relevance, loss_mapping, ipcc)
+    region_index, lat, lon = synthetic_region_grid(len(ipcc), args.resolution)
+
+    t0 = time.perf_counter()
+    cells, risk = grid_risk(arrays, region_index, chunk=args.chunk)
+    t_risk = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "risk_grid.npz")
+        t0 = time.perf_counter()
+        save_risk_grid(path, cells, risk, region_index.shape, lat, lon)
+        t_save = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        grid, _, _ = read_risk_grid(path)
+        t_read = time.perf_counter() - t0
+        size = os.path.getsize(path)
+
+    regional = run_pipeline(['risk_by_gdp'], inputs={'relevance': relevance, 'loss_mapping': loss_mapping,
+                                                     'ipcc': ipcc}, use_cache=False)['risk_by_gdp']
+    expected = regional['TotalRiskbyGDP'].to_numpy()[region_index.ravel()[cells]]
+    assert np.allclose(risk, expected, rtol=1e-9, atol=0)
+    assert np.allclose(grid.ravel()[cells], risk.astype(np.float32))
+
+    print(f"{region_index.size:,d} cells, {len(cells):,d} land cells, {len(ipcc)} AR6 regions")
+    print(f"cell risk      : {t_risk:7.3f} s")
+    print(f"write .npz     : {t_save:7.3f} s  {size / 2**20:6.1f} MiB")
+    print(f"read to dense  : {t_read:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# TEMPO yearly profile benchmark: per-year filter loops + repeated concat vs
+# one grouped aggregation with categorical dimensions.
+#
+# Run from the repository root, either on a synthetic national table
+#   python benchmarks/bench_tempo_profiles.py --states 4 --years 14
+# or on a real TEMPO dataset directory (table.csv / table.parquet + metadata.json)
+#   python benchmarks/bench_tempo_profiles.py --dataset path/to/tempo_simple
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Transportation_Texas"))
+
+from tempo_data import load_tempo
+from tempo_profiles import as_categorical, yearly_profiles
+
+YEAR = "tempo_project_model_years"
+
+
+def synthetic_tempo(states=48, years=27, subsectors=6, scenarios=3, hours=8784, seed=0):
+    """
+    Unpivoted table shaped like TEMPO: state x scenario x year x subsector x hour
+    """
+    rng = np.random.default_rng(seed)
+    time_est = pd.date_range("2012-01-01", periods=hours, freq="h")
+    keys = pd.MultiIndex.from_product([
+        [f"S{i:02d}" for i in range(states)],
+        [f"scenario_{i}" for i in range(scenarios)],
+        [str(2024 + i) for i in range(years)],
+        [f"{'bev' if i % 2 else 'phev'}_class_{i}" for i in range(subsectors)],
+    ], names=["state", "scenario", YEAR, "subsector"])
+    n = len(keys) * hours
+    return pd.DataFrame({
+        "time_est": np.tile(time_est.values, len(keys)),
+        "state": np.repeat(keys.get_level_values(0).values, hours),
+        "scenario": np.repeat(keys.get_level_values(1).values, hours),
+        YEAR: np.repeat(keys.get_level_values(2).values, hours),
+        "subsector": np.repeat(keys.get_level_values(3).values, hours),
+        "value": rng.random(n) * 100,
+    })
+
+
+def legacy_profiles(df):
+    """
+    The original script: filter per year twice, then grow with pd.concat
+    """
+    unique_years = df[YEAR].unique()
+    yearly_dataframes = {}
+    for year in unique_years:
+        yearly_dataframes[f'df_{year}'] = df[df[YEAR] == year]
+    summed_yearly_dataframes = {}
+    for year in unique_years:
+        df_year = df[df[YEAR] == year]
+        summed_yearly_dataframes[f'summed_df_{year}'] = df_year.groupby('time_est')['value'].sum().reset_index()
+    all_years_df = pd.DataFrame()
+    for year in unique_years:
+        df_summed = summed_yearly_dataframes[f'summed_df_{year}']
+        df_summed['year'] = year
+        all_years_df = pd.concat([all_years_df, df_summed], axis=0)
+    return all_years_df
+
+
+def single_pass(df):
+    return yearly_profiles(df, year_column=YEAR)
+
+
+def measure(func, df):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", type=Path, default=None)
+    parser.add_argument("--states", type=int, default=4)
+    parser.add_argument("--years", type=int, default=14)
+    parser.add_argument("--subsectors", type=int, default=6)
+    parser.add_argument("--scenarios", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.dataset is not None:
+        df = load_tempo(args.dataset)
+    else:
+        df = synthetic_tempo(args.states, args.years, args.subsectors, args.scenarios)
+    df[YEAR] = df[YEAR].astype(str)
+    print(f"{len(df):,d} rows, {df.memory_usage(deep=True).sum() / 2**20:,.0f} MiB in memory")
+
+    legacy, t_legacy, m_legacy = measure(legacy_profiles, df)
+    # done once at load time in the script
+    _, t_cat, m_cat = measure(lambda d: as_categorical(d, ["scenario", "state", "subsector", YEAR]), df)
+    fast, t_fast, m_fast = measure(single_pass, df)
+
+    legacy = legacy.sort_values(["year", "time_est"]).reset_index(drop=True)
+    fast = fast.astype({"year": str}).sort_values(["year", "time_est"]).reset_index(drop=True)
+    assert np.allclose(legacy["value"].to_numpy(), fast["value"].to_numpy())
+    assert (legacy["year"].to_numpy() == fast["year"].to_numpy()).all()
+
+    print(f"legacy loops + concat : {t_legacy:8.2f} s  peak {m_legacy / 2**20:10,.1f} MiB")
+    print(f"categorical dtypes    : {t_cat:8.2f} s  peak {m_cat / 2**20:10,.1f} MiB")
+    print(f"single groupby        : {t_fast:8.2f} s  peak {m_fast / 2**20:10,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# WMO loss weighting benchmark: the original row-wise df.apply per event and
+# per set of loss totals vs the broadcast batch over all sets at once.
+#
+# Run from the repository root:
+#   python benchmarks/bench_weighted_losses.py --samples 1000
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "ClimateRisk_IPCCAR6"
+sys.path.insert(0, str(DATA))
+
+from climate_risk import WMO_REGION_LOSSES, calculate_weighted_losses_batch
+
+
+def legacy_weighted_losses(df, region_losses):
+    event_columns = df.columns[1:]
+    weighted_losses_df = df[['WMO_Region']].copy()
+    for event in event_columns:
+        weighted_losses_df[event + '_Loss'] = df.apply(
+            lambda row: row[event] * region_losses.get(row['WMO_Region'], 0) if pd.notnull(row[event]) else 0, axis=1
+        )
+    return weighted_losses_df
+
+
+def sample_losses(samples, spread=0.5, seed=0):
+    """
+    Loss totals drawn uniformly within +/- spread of the reported values
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({region: total * rng.uniform(1 - spread, 1 + spread, samples)
+                         for region, total in WMO_REGION_LOSSES.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--legacy-samples", type=int, default=50,
+                        help="sets timed with the row-wise version (extrapolated)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA / "WMO_LossData_mapping.csv")
+    losses = sample_losses(args.samples)
+
+    n_legacy = min(args.legacy_samples, args.samples)
+    t0 = time.perf_counter()
+    legacy = [legacy_weighted_losses(df, losses.iloc[s].to_dict()) for s in range(n_legacy)]
+    t_legacy = (time.perf_counter() - t0) * args.samples / n_legacy
+
+    t0 = time.perf_counter()
+    batch = calculate_weighted_losses_batch(df, losses)
+    t_batch = time.perf_counter() - t0
+
+    for s, frame in enumerate(legacy):
+        assert np.array_equal(batch[s], frame.iloc[:, 1:].to_numpy(dtype=np.float64))
+
+    print(f"{args.samples:,d} sets of WMO loss totals, {batch.shape[1]} regions x {batch.shape[2]} events")
+    print(f"row-wise apply (extrapolated) : {t_legacy:9.3f} s")
+    print(f"broadcast batch               : {t_batch:9.4f} s  ({t_legacy / t_batch:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
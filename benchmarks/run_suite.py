@@ -0,0 +1,287 @@
+# Benchmark suite over the hot paths of every module, on synthetic inputs of
+# 10^2 - 10^6 rows (benchmarks/synthetic.py). For each case and size it
+# records the best wall time over a few calls and the peak traced memory of
+# one call (tracemalloc, which sees numpy and pandas buffers), and stores the
+# run in benchmarks/.results/<commit>.json (<commit>-dirty.json for an
+# uncommitted tree). Runs are compared with the nearest ancestor commit that
+# has results, so a regression shows up as a ratio above the tolerance.
+#
+# Run from the repository root:
+#   python benchmarks/run_suite.py                          # 10^2 .. 10^5 rows
+#   python benchmarks/run_suite.py --max-rows 1e6 heat_index tempo_profiles
+#   python benchmarks/run_suite.py --compare v1.0 --strict  # exit 1 on regression
+#   python benchmarks/run_suite.py --history tempo_profiles --rows 100000
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+for _directory in ['ClimateRisk_IPCCAR6', 'GCAM', 'HurricaneBeryl', 'Hurricane_Texas', 'Transportation_Texas']:
+    sys.path.insert(0, str(ROOT / _directory))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import synthetic
+
+RESULTS_DIR = Path(__file__).resolve().parent / ".results"
+SIZES = [10 ** k for k in range(2, 7)]
+
+###############################################################################
+#                                   Cases
+###############################################################################
+# Every setup(rows, tmp) builds its inputs (untimed) and returns the
+# zero-argument call that is measured.
+
+def _heat_index(rows, tmp):
+    from heat_index import c2f_array, heat_index_array, relative_humidity_array
+    from isd_reader import decode_temperature_celsius
+    station = synthetic.isd_station(rows)
+    tmp_f = c2f_array(decode_temperature_celsius(station['TMP']).to_numpy())
+    dew_f = c2f_array(decode_temperature_celsius(station['DEW']).to_numpy())
+    return lambda: heat_index_array(tmp_f, relative_humidity_array(tmp_f, dew_f))
+
+def _isd_read(rows, tmp):
+    from isd_reader import read_isd
+    path = Path(tmp) / 'station.csv'
+    synthetic.isd_station(rows).to_csv(path, index=False)
+    return lambda: read_isd(path, '2024-01-01', '2200-01-01')
+
+def _station_heat_index(rows, tmp):
+    from event_pipeline import station_heat_index
+    path = Path(tmp) / 'station.csv'
+    synthetic.isd_station(rows).to_csv(path, index=False)
+    return lambda: station_heat_index(path, '2024-01-01', '2200-01-01')
+
+def _weighted_losses(rows, tmp):
+    from climate_risk import calculate_weighted_losses
+    df, region_losses = synthetic.wmo_loss_tables(rows)
+    return lambda: calculate_weighted_losses(df, region_losses)
+
+def _event_proportion(rows, tmp):
+    from climate_risk import calculate_event_proportion_all
+    relevance, _ = synthetic.ar6_tables(rows)
+    return lambda: calculate_event_proportion_all(relevance)
+
+def _risk_chain(rows, tmp):
+    from risk_pipeline import run_pipeline
+    relevance, ipcc = synthetic.ar6_tables(rows)
+    inputs = {'relevance': relevance, 'ipcc': ipcc}
+    return lambda: run_pipeline(['risk_by_gdp'], inputs=inputs, data_dir=ROOT / 'ClimateRisk_IPCCAR6',
+                                use_cache=False)
+
+def _gcam_mapping(rows, tmp):
+    from gcam_mapping import expand_region_mapping, regions_to_countries
+    rates, mapping = synthetic.gcam_rates(rows)
+    return lambda: regions_to_countries(rates, expand_region_mapping(mapping))
+
+def _gcam_sector_rates(rows, tmp):
+    from gcam_electrification import rates_from_sums, read_gcam_table, sector_sums
+    electricity, final = synthetic.gcam_export(rows)
+    paths = Path(tmp) / 'electricity.csv', Path(tmp) / 'final_energy.csv'
+    electricity.to_csv(paths[0], index=False)
+    final.to_csv(paths[1], index=False)
+    return lambda: rates_from_sums(sector_sums(read_gcam_table(paths[0]), read_gcam_table(paths[1])))
+
+def _tempo_load(rows, tmp):
+    from tempo_data import load_tempo
+    dataset = synthetic.write_tempo_dataset(synthetic.tempo_table(rows), Path(tmp) / 'tempo')
+    return lambda: load_tempo(dataset, filters={'state': 'TX', 'scenario': 'efs_high_ldv'}, months=(6, 11))
+
+def _tempo_profiles(rows, tmp):
+    from tempo_profiles import as_categorical, yearly_profiles
+    df = synthetic.tempo_table(rows)
+    return lambda: yearly_profiles(as_categorical(df.copy()))
+
+def _tempo_peaks(rows, tmp):
+    from tempo_profiles import as_categorical, bev_share_by_year, daily_peaks, powertrain_hourly
+    df = as_categorical(synthetic.tempo_table(rows))
+    return lambda: bev_share_by_year(daily_peaks(powertrain_hourly(df)))
+
+def _gpd_fit(rows, tmp):
+    from gpd_engine import fit_pot
+    values = 30 + np.random.default_rng(0).gamma(2.0, 6.0, rows)
+    return lambda: fit_pot(values, 2.5)
+
+# name: (setup, largest size run)
+CASES = {
+    'heat_index': (_heat_index, 10 ** 6),
+    'isd_read': (_isd_read, 10 ** 6),
+    'station_heat_index': (_station_heat_index, 10 ** 6),
+    'weighted_losses': (_weighted_losses, 10 ** 6),
+    'event_proportion': (_event_proportion, 10 ** 6),
+    'risk_chain': (_risk_chain, 10 ** 5),
+    'gcam_mapping': (_gcam_mapping, 10 ** 6),
+    'gcam_sector_rates': (_gcam_sector_rates, 10 ** 6),
+    'tempo_load': (_tempo_load, 10 ** 6),
+    'tempo_profiles': (_tempo_profiles, 10 ** 6),
+    'tempo_peaks': (_tempo_peaks, 10 ** 6),
+    'gpd_fit': (_gpd_fit, 10 ** 6),
+}
+
+###############################################################################
+#                                Measurement
+###############################################################################
+def measure(call, repeat=3, max_seconds=2.0):
+    """
+    Best wall time (s) over up to `repeat` calls, fewer once the calls add
+    up to max_seconds, and peak traced memory (MB) of one more call
+    """
+    times = []
+    while len(times) < repeat and sum(times) < max_seconds:
+        gc.collect()
+        t0 = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 2 ** 20
+
+def run_suite(cases=None, sizes=SIZES, max_rows=10 ** 5, repeat=3):
+    """
+    {case: {rows: {'seconds', 'peak_mb'}}} for every case and size up to
+    max_rows and the case's own limit
+    """
+    results = {}
+    for name in cases or CASES:
+        setup, limit = CASES[name]
+        results[name] = {}
+        for rows in sizes:
+            if rows > min(max_rows, limit):
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                call = setup(rows, tmp)
+                call()   # warm-up: imports, caches, page faults
+                seconds, peak_mb = measure(call, repeat)
+            results[name][str(rows)] = {'seconds': seconds, 'peak_mb': peak_mb}
+            print(f"{name:20s} {rows:>9d} rows {seconds * 1000:11.2f} ms {peak_mb:10.1f} MB", flush=True)
+    return results
+
+###############################################################################
+#                                  History
+###############################################################################
+def _git(*args):
+    return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+def current_run_id():
+    commit = _git('rev-parse', 'HEAD')
+    dirty = bool(_git('status', '--porcelain', '--untracked-files=no'))
+    return commit + ('-dirty' if dirty else '')
+
+def save_run(results, run_id):
+    """
+    Merge results into the run's file, so cases run separately accumulate
+    """
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f'{run_id}.json'
+    run = json.loads(path.read_text()) if path.exists() else {'results': {}}
+    run.update({'commit': run_id, 'subject': _git('log', '-1', '--format=%s'),
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                'numpy': np.__version__, 'pandas': pd.__version__})
+    for case, by_size in results.items():
+        run['results'].setdefault(case, {}).update(by_size)
+    path.write_text(json.dumps(run, indent=1))
+    return path
+
+def load_run(run_id):
+    path = RESULTS_DIR / f'{run_id}.json'
+    return json.loads(path.read_text()) if path.exists() else None
+
+def stored_ancestors(ref='HEAD'):
+    """
+    Run ids with stored results along the history of ref, newest first
+    """
+    return [c for c in _git('rev-list', ref).split() if (RESULTS_DIR / f'{c}.json').exists()]
+
+def compare(results, baseline, tolerance=0.25, min_seconds=1e-3):
+    """
+    Rows of case, rows, time ratio and memory ratio against a baseline run;
+    a regression is a ratio above 1 + tolerance (times under min_seconds are
+    not judged)
+    """
+    rows = []
+    for case, by_size in results.items():
+        for size, new in by_size.items():
+            old = baseline['results'].get(case, {}).get(size)
+            if old is None:
+                continue
+            time_ratio = new['seconds'] / old['seconds']
+            memory_ratio = new['peak_mb'] / old['peak_mb'] if old['peak_mb'] > 0 else np.nan
+            slower = time_ratio > 1 + tolerance and new['seconds'] >= min_seconds
+            larger = memory_ratio > 1 + tolerance and new['peak_mb'] >= 1.0
+            rows.append({'case': case, 'rows': int(size), 'time_ratio': time_ratio,
+                         'memory_ratio': memory_ratio, 'regression': slower or larger})
+    return pd.DataFrame(rows, columns=['case', 'rows', 'time_ratio', 'memory_ratio', 'regression'])
+
+def history(case, rows, ref='HEAD'):
+    """
+    Time and peak memory of one case and size for every stored ancestor
+    commit, oldest first
+    """
+    records = []
+    for commit in reversed(stored_ancestors(ref)):
+        run = load_run(commit)
+        result = run['results'].get(case, {}).get(str(rows))
+        if result is not None:
+            records.append({'commit': commit[:10], 'subject': run['subject'][:50],
+                            'ms': result['seconds'] * 1000, 'peak_mb': result['peak_mb']})
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic inputs")
+    parser.add_argument("cases", nargs="*", help=f"any of {list(CASES)} (default all)")
+    parser.add_argument("--max-rows", type=float, default=1e5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", default=None, help="git ref of the baseline (default nearest stored ancestor)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--strict", action="store_true", help="exit 1 when a regression is found")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--history", default=None, metavar="CASE", help="print the stored history of a case")
+    parser.add_argument("--rows", type=int, default=10 ** 5, help="size shown by --history")
+    args = parser.parse_args()
+
+    if args.history:
+        print(history(args.history, args.rows).to_string(index=False))
+        return
+    unknown = [c for c in args.cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases {unknown}, expected any of {list(CASES)}")
+
+    run_id = current_run_id()
+    if args.compare:
+        baseline_id = _git('rev-parse', args.compare)
+    else:
+        # for a dirty tree the HEAD commit itself is the baseline
+        baseline_id = next((c for c in stored_ancestors() if c != run_id), None)
+    baseline = load_run(baseline_id) if baseline_id else None
+
+    results = run_suite(args.cases or None, max_rows=int(args.max_rows), repeat=args.repeat)
+    if not args.no_save:
+        print(f"results -> {save_run(results, run_id)}")
+    if baseline is None:
+        print("no baseline results to compare with")
+        return
+    table = compare(results, baseline, args.tolerance)
+    print(f"\nagainst {baseline_id[:10]} ({baseline['subject']}):")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if args.strict and table['regression'].any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
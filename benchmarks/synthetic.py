@@ -0,0 +1,184 @@
+# Synthetic inputs for the benchmark suite, sized by row count.
+#
+# Each generator mirrors the layout of a bundled input so the library
+# functions can be run on it unchanged:
+#
+#   isd_station      NOAA Global Hourly (ISD) station CSV, 72243612906.csv
+#   tempo_table      unpivoted TEMPO table (+ write_tempo_dataset for loaders)
+#   gcam_rates       GCAM region rate table + Region_to_Country mapping
+#   gcam_export      GCAM sector consumption query export
+#   ar6_tables       RiskRelevance / IPCC AR6 region tables
+#   wmo_loss_tables  WMO_LossData_mapping + region loss totals
+#
+# All generators are deterministic for a given seed.
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+AR6_DIR = ROOT / "ClimateRisk_IPCCAR6"
+
+YEARS = [1990] + list(range(2005, 2101, 5))
+TEMPO_YEAR = "tempo_project_model_years"
+
+###############################################################################
+#                                  ISD
+###############################################################################
+def _signed_field(tenths, qc='1'):
+    tenths = np.round(tenths).astype(np.int64)
+    sign = np.where(tenths < 0, '-', '+')
+    return pd.Series(sign).str.cat(pd.Series(np.abs(tenths)).astype(str).str.zfill(4)) + f',{qc}'
+
+def isd_station(rows, start='2024-01-01', seed=0, station='72243612906'):
+    """
+    ISD station table with hourly reports: STATION, DATE, REPORT_TYPE and the
+    TMP, DEW, WND mandatory fields, with ~1% missing (+9999) temperatures
+    """
+    rng = np.random.default_rng(seed)
+    hours = np.arange(rows)
+    seasonal = 20 + 10 * np.sin(2 * np.pi * hours / 8784) + 5 * np.sin(2 * np.pi * hours / 24)
+    tmp = seasonal + rng.normal(0, 2, rows)
+    dew = tmp - rng.gamma(2.0, 2.5, rows)
+    tmp_field = _signed_field(tmp * 10)
+    tmp_field[rng.random(rows) < 0.01] = '+9999,9'
+    direction = rng.integers(0, 36, rows) * 10
+    speed = rng.gamma(2.0, 20, rows).astype(np.int64)
+    wnd = (pd.Series(direction).astype(str).str.zfill(3) + ',1,N,' +
+           pd.Series(speed).astype(str).str.zfill(4) + ',1')
+    return pd.DataFrame({
+        'STATION': station,
+        'DATE': (pd.Timestamp(start) + pd.to_timedelta(hours, 'h') + pd.Timedelta(minutes=54))
+                .strftime('%Y-%m-%dT%H:%M:%S'),
+        'REPORT_TYPE': np.where(hours % 24 == 23, 'FM-12', 'FM-15'),
+        'WND': wnd,
+        'TMP': tmp_field,
+        'DEW': _signed_field(dew * 10),
+    })
+
+###############################################################################
+#                                 TEMPO
+###############################################################################
+def tempo_table(rows, states=('TX', 'CA', 'FL'), years=(2030, 2040, 2050), subsectors=4,
+                scenarios=('efs_high_ldv', 'reference'), seed=0):
+    """
+    Unpivoted TEMPO table of about `rows` rows: state x scenario x model year
+    x subsector x hour, the hour count chosen to reach the size. Up to a
+    year of hours they are spread evenly over 2012, so every month is present.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"{'bev' if i % 2 else 'phev'}_class_{i}" for i in range(subsectors)]
+    keys = pd.MultiIndex.from_product([list(states), list(scenarios), [str(y) for y in years], names],
+                                      names=["state", "scenario", TEMPO_YEAR, "subsector"])
+    hours = max(1, -(-rows // len(keys)))
+    offsets = np.linspace(0, 8783, hours).astype(np.int64) if hours <= 8784 else np.arange(hours)
+    time_est = pd.Timestamp("2012-01-01") + pd.to_timedelta(offsets, "h")
+    df = pd.DataFrame({
+        "time_est": np.tile(time_est.values, len(keys)),
+        **{name: np.repeat(keys.get_level_values(name).values, hours) for name in keys.names},
+        "value": rng.random(len(keys) * hours) * 100,
+    })
+    return df.iloc[:rows].reset_index(drop=True)
+
+def write_tempo_dataset(df, dataset_path):
+    """
+    CSV TEMPO dataset directory (table.csv + metadata.json) readable by
+    tempo_data.load_tempo
+    """
+    dataset_path = Path(dataset_path)
+    dataset_path.mkdir(parents=True, exist_ok=True)
+    df.to_csv(dataset_path / "table.csv", index=False, date_format='%Y-%m-%d %H:%M:%S')
+    dims = {"state": "state", "scenario": "scenario", "model_year": TEMPO_YEAR,
+            "subsector": "subsector", "time": "time_est"}
+    metadata = {
+        "table_format": {"format_type": "unpivoted", "value_column": "value"},
+        "dimensions": {dim: [{"column_names": [col]}] for dim, col in dims.items()},
+    }
+    (dataset_path / "metadata.json").write_text(json.dumps(metadata, indent=1))
+    return dataset_path
+
+###############################################################################
+#                                  GCAM
+###############################################################################
+def gcam_rates(rows, regions=32, units_per_region=8, seed=0):
+    """
+    Electrification rate table (sceanrio, region, one column per year) of
+    `rows` scenario x region rows, and a Region_to_Country mapping with
+    comma-separated countries
+    """
+    rng = np.random.default_rng(seed)
+    region_names = [f"Region_{i:02d}" for i in range(regions)]
+    scenarios = max(1, -(-rows // regions))
+    rates = pd.DataFrame(rng.random((scenarios * regions, len(YEARS))), columns=[str(y) for y in YEARS])
+    rates.insert(0, "region", np.tile(region_names, scenarios))
+    rates.insert(0, "sceanrio", np.repeat([f"Scenario_{s}" for s in range(scenarios)], regions))
+    mapping = pd.DataFrame({
+        "GCAM Region": region_names,
+        "Countries": [", ".join(f"Unit_{r:02d}_{u:03d}" for u in range(units_per_region))
+                      for r in range(regions)],
+    })
+    return rates.iloc[:rows].reset_index(drop=True), mapping
+
+def gcam_export(rows, regions=32, sectors=20, seed=0):
+    """
+    Electricity and final-energy sector consumption exports (Scenario,
+    region, sector, input, years, Units) of about `rows` rows each; the
+    final energy is at least the electricity of every row
+    """
+    rng = np.random.default_rng(seed)
+    per_scenario = regions * sectors
+    scenarios = max(1, -(-rows // per_scenario))
+    keys = pd.MultiIndex.from_product([[f"Scenario_{s},date=2024-4-8" for s in range(scenarios)],
+                                       [f"Region_{r:02d}" for r in range(regions)],
+                                       [f"sector_{k:02d}" for k in range(sectors)]])
+    n = len(keys)
+    electricity = rng.gamma(2.0, 0.05, (n, len(YEARS))).cumsum(axis=1)
+    final = electricity * (1 + rng.gamma(2.0, 1.0, (n, 1)))
+
+    def frame(values, fuel):
+        df = pd.DataFrame(values, columns=[str(y) for y in YEARS])
+        df.insert(0, "input", fuel)
+        for i, name in reversed(list(enumerate(["Scenario", "region", "sector"]))):
+            df.insert(0, name, keys.get_level_values(i))
+        df["Units"] = "EJ"
+        return df.iloc[:rows].reset_index(drop=True)
+    return frame(electricity, "elect_td_bld"), frame(final, "refined liquids")
+
+###############################################################################
+#                                 IPCC AR6
+###############################################################################
+def ar6_tables(rows):
+    """
+    RiskRelevance and IPCC AR6 region tables of `rows` regions, tiled from the
+    bundled 58-region tables with unique names and OIDs so every stage of the
+    risk chain runs unchanged
+    """
+    relevance = pd.read_csv(AR6_DIR / "RiskRelevance_240928_GDP.csv")
+    ipcc = pd.read_csv(AR6_DIR / "IPCC_ClimateRiskv3_revisegdp_240927v2.csv")
+    idx = np.arange(rows) % len(ipcc)
+    copy = np.arange(rows) // len(ipcc)
+
+    def tile(df):
+        out = df.iloc[idx].reset_index(drop=True)
+        out['Name'] = out['Name'] + np.where(copy > 0, '#' + pd.Series(copy).astype(str), '')
+        out['Acronym'] = out['Acronym'] + np.where(copy > 0, pd.Series(copy).astype(str), '')
+        out['OID_'] = np.arange(rows)
+        return out
+    return tile(relevance), tile(ipcc)
+
+def wmo_loss_tables(rows, seed=0):
+    """
+    WMO_LossData_mapping-shaped table of `rows` loss regions (event shares,
+    NaN for absent events) and the total loss of each region
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(AR6_DIR / "WMO_LossData_mapping.csv", encoding='utf-8-sig')
+    events = list(template.columns[1:])
+    shares = rng.dirichlet(np.ones(len(events)), rows)
+    shares[rng.random(shares.shape) < 0.4] = np.nan
+    df = pd.DataFrame(shares, columns=events)
+    regions = [f"WMO_{i:07d}" for i in range(rows)]
+    df.insert(0, 'WMO_Region', regions)
+    return df, dict(zip(regions, rng.lognormal(10, 1, rows)))
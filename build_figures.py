@@ -0,0 +1,262 @@
+# Headless, incremental build of the paper figures.
+#
+# Every plotting script exposes figure_data(data_dir) (compute) and one or
+# more render(data, style, output, dpi) functions, plus its INPUT_FILES and
+# default STYLE. The build
+#
+#   1. fingerprints each module's inputs (content hashes, remembered by size
+#      and mtime so unchanged files are not re-read) and the .py files of its
+#      directory,
+#   2. recomputes the figure data of modules whose fingerprint changed, in
+#      worker processes, caching it in .figure_cache/,
+#   3. renders, again in parallel and with the Agg backend, every figure
+#      whose data, style or dpi changed or whose output is missing. Each
+#      render starts from matplotlib's default rcParams and seaborn color
+#      codes, so a figure does not depend on what its worker rendered before.
+#
+# Figures whose inputs are not present (e.g. the TEMPO dataset) are skipped.
+#
+# Run from the repository root:
+#   python build_figures.py                           # all figures -> figures/
+#   python build_figures.py gpd_return_period --dpi 300
+#   python build_figures.py --style style.json        # {figure: {style key: value}}
+#   python build_figures.py --force
+
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')   # before any module imports pyplot, also for workers
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import json
+import logging
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from stage_trace import stage
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR_NAME = '.figure_cache'
+CACHE_VERSION = 2
+OUTPUT_DIR = 'figures'
+DPI = 600
+
+# name: (module directory, module, render function, output file)
+FIGURES = {
+    'gpd_return_period': ('Hurricane_Texas', 'Plot_GPD_ReturnPeriod', 'render',
+                          'GPD_ReturnPeriod.png'),
+    'beryl_windsolar_heatindex': ('HurricaneBeryl', 'Plot_WindSolar_HeatIndex', 'render',
+                                  'WindSolar_HeatIndex.png'),
+    'ev_charging_demand': ('Transportation_Texas', 'tempo_transportation_tx', 'render_charging_demand',
+                           'EV_Charging_Demand_Hurricane_Season.png'),
+    'bev_flexibility': ('Transportation_Texas', 'tempo_transportation_tx', 'render_flexibility',
+                        'BEV_Potential_Flexibility_2050.png'),
+}
+
+for _directory in sorted({spec[0] for spec in FIGURES.values()}):
+    sys.path.insert(0, str(ROOT / _directory))
+
+###############################################################################
+#                               Fingerprints
+###############################################################################
+def _file_sha256(file_path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _input_files(path):
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*') if p.is_file())
+    return [path] if path.exists() else []
+
+def fingerprint(paths, known):
+    """
+    Hash of the content of every file under `paths`; `known` maps a file to
+    its [size, mtime_ns, sha256] and is updated, so only new or touched
+    files are read
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        for file_path in _input_files(path):
+            stat = file_path.stat()
+            entry = known.get(str(file_path))
+            if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+                entry = known[str(file_path)] = [stat.st_size, stat.st_mtime_ns, _file_sha256(file_path)]
+            h.update(f'{file_path.relative_to(ROOT)}:{entry[2]}'.encode())
+    return h.hexdigest()
+
+def _style_hash(style, dpi):
+    return hashlib.sha256(json.dumps([style, dpi], sort_keys=True, default=str).encode()).hexdigest()
+
+###############################################################################
+#                                  Workers
+###############################################################################
+def _compute(directory, module_name, cache_path):
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_name)
+    with stage(f'{module_name}.figure_data'):
+        data = module.figure_data(ROOT / directory)
+    tmp = cache_path.with_name(f'.{cache_path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_path)
+    return time.perf_counter() - t0
+
+@contextlib.contextmanager
+def _default_style():
+    """
+    matplotlib rcParams and seaborn color codes reset to the library defaults
+    for the duration of one render; render functions update this global
+    state and workers are reused
+    """
+    import matplotlib
+    with matplotlib.rc_context():
+        matplotlib.rcdefaults()
+        if 'seaborn' in sys.modules:
+            sys.modules['seaborn'].set_color_codes('reset')
+        yield
+
+def _render(module_name, render_name, cache_path, style, output, dpi):
+    import matplotlib.pyplot as plt
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_name)
+    with open(cache_path, 'rb') as f:
+        data = pickle.load(f)
+    tmp = output.with_name(f'.{output.stem}.{os.getpid()}.tmp{output.suffix}')
+    with _default_style(), stage(f'{module_name}.{render_name}', output=output.name):
+        fig = getattr(module, render_name)(data, style, output=tmp, dpi=dpi)
+    if fig is None:
+        return None
+    plt.close(fig)
+    os.replace(tmp, output)
+    return time.perf_counter() - t0
+
+def _run(func, tasks, workers):
+    """
+    {key: (result, error)} of func(*args) for every (key, args) task
+    """
+    results = {}
+    if workers == 1 or len(tasks) <= 1:
+        for key, args in tasks:
+            try:
+                results[key] = (func(*args), None)
+            except Exception as err:
+                results[key] = (None, err)
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {key: pool.submit(func, *args) for key, args in tasks}
+        for key, future in futures.items():
+            try:
+                results[key] = (future.result(), None)
+            except Exception as err:
+                results[key] = (None, err)
+    return results
+
+###############################################################################
+#                                   Build
+###############################################################################
+def build(names=None, output_dir=OUTPUT_DIR, styles=None, dpi=DPI, workers=None,
+          cache_dir=CACHE_DIR_NAME, force=False):
+    """
+    Build the requested figures (default all) and return {figure: status},
+    status one of 'built', 'up to date', 'missing inputs', 'no data' or
+    'failed: <error>'.
+
+    styles: {figure: {style key: value}} overriding the module's STYLE
+    """
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [n for n in names if n not in FIGURES]
+    if unknown:
+        raise KeyError(f"unknown figures {unknown}, expected any of {list(FIGURES)}")
+    output_dir, cache_dir = ROOT / output_dir, ROOT / cache_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = cache_dir / 'manifest.json'
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    known, built = manifest.get('files', {}), manifest.get('figures', {})
+
+    status, data_keys, stale = {}, {}, {}
+    for name in names:
+        directory, module_name, render_name, file_name = FIGURES[name]
+        module = importlib.import_module(module_name)
+        inputs = [ROOT / directory / f for f in module.INPUT_FILES]
+        if not all(p.exists() for p in inputs):
+            status[name] = 'missing inputs'
+            continue
+        if module_name not in data_keys:
+            sources = sorted((ROOT / directory).glob('*.py'))
+            key = hashlib.sha256(json.dumps([CACHE_VERSION, module_name, fingerprint(sources, known),
+                                             fingerprint(inputs, known)]).encode()).hexdigest()
+            data_keys[module_name] = (directory, cache_dir / f'{module_name}_{key[:20]}.pkl')
+        style = {**module.STYLE, **(styles or {}).get(name, {})}
+        key = f'{data_keys[module_name][1].stem}:{_style_hash(style, dpi)}'
+        output = output_dir / file_name
+        if not force and built.get(name) == key and output.exists():
+            status[name] = 'up to date'
+        else:
+            stale[name] = (module_name, render_name, style, output, key)
+
+    # compute: one task per module whose data is needed and not cached
+    compute = {stale[n][0] for n in stale}
+    tasks = [(m, (data_keys[m][0], m, data_keys[m][1])) for m in sorted(compute)
+             if force or not data_keys[m][1].exists()]
+    failed = {}
+    for module_name, (seconds, err) in _run(_compute, tasks, workers).items():
+        if err is not None:
+            failed[module_name] = err
+            logger.error(f"{module_name}: figure data failed: {err!r}")
+            continue
+        logger.info(f"{module_name}: figure data computed in {seconds:.2f} s")
+        for old in cache_dir.glob(f'{module_name}_*.pkl'):
+            if old != data_keys[module_name][1]:
+                old.unlink()
+
+    # render
+    tasks = [(n, (m, r, data_keys[m][1], style, output, dpi))
+             for n, (m, r, style, output, _) in stale.items() if m not in failed]
+    for name, (seconds, err) in _run(_render, tasks, workers).items():
+        if err is not None:
+            status[name] = f'failed: {err!r}'
+        elif seconds is None:
+            status[name] = 'no data'
+        else:
+            status[name] = 'built'
+            built[name] = stale[name][4]
+            logger.info(f"{name}: rendered in {seconds:.2f} s")
+    for name, (module_name, *_) in stale.items():
+        if module_name in failed:
+            status[name] = f'failed: {failed[module_name]!r}'
+
+    tmp = manifest_path.with_name(f'.manifest.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps({'files': known, 'figures': built}, indent=1))
+    os.replace(tmp, manifest_path)
+    return {name: status[name] for name in names}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Headless incremental figure build")
+    parser.add_argument('figures', nargs='*', help=f"any of {list(FIGURES)} (default all)")
+    parser.add_argument('-o', '--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--style', default=None, help="JSON file of {figure: {style key: value}}")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="recompute and render everything")
+    args = parser.parse_args()
+
+    styles = json.loads(Path(args.style).read_text()) if args.style else None
+    t0 = time.perf_counter()
+    result = build(args.figures or None, args.output_dir, styles, args.dpi, args.workers, force=args.force)
+    for name, state in result.items():
+        print(f"{name:28s} {state}")
+    print(f"done in {time.perf_counter() - t0:.1f} s")
+    sys.exit(any(s.startswith('failed') for s in result.values()))
@@ -0,0 +1,275 @@
+# Stage-level timing for the analysis pipelines, off by default.
+#
+# Pipeline functions are marked as stages, either as a decorator or around a
+# block:
+#
+#   @stage                               # named module.function
+#   def read_isd(...): ...
+#
+#   with stage('risk_pipeline.risk_matrix') as s:
+#       frame = risk_matrix(...)
+#       s.rows = len(frame)
+#
+# While disabled a stage costs one global lookup. When enabled, every stage
+# records its wall time, row count (rows of a returned DataFrame / array, or
+# the `rows` set in the block) and the change in resident memory, logs one
+# line, and appends a complete event to a Chrome trace (chrome://tracing,
+# https://ui.perfetto.dev). Worker processes inherit the setting through the
+# environment and write their own part files, which the enabling process
+# merges into the trace at exit. With a profile directory, each outermost
+# stage (or each stage named in `profile_stages`) is also run under cProfile
+# and dumped to <profile_dir>/<stage>.<pid>.<n>.prof.
+#
+# The pipeline modules put the repository root on sys.path and import stage
+# from here, as build_figures.py does. Enable it for any script without code
+# changes, from the script directory:
+#   STAGE_TRACE=trace.json python event_pipeline.py --station ...
+#   STAGE_TRACE=trace.json STAGE_PROFILE=profiles python risk_pipeline.py --no-cache
+# and summarize a trace per stage:
+#   python stage_trace.py trace.json
+
+import argparse
+import atexit
+import functools
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ENV_TRACE = 'STAGE_TRACE'
+ENV_PROFILE = 'STAGE_PROFILE'
+ENV_PROFILE_STAGES = 'STAGE_PROFILE_STAGES'
+ENV_OWNER = 'STAGE_TRACE_OWNER'
+
+# settings while enabled, None while disabled
+_state = None
+_local = threading.local()
+_profile_count = itertools.count()
+
+###############################################################################
+#                                   Memory
+###############################################################################
+def _rss_mb():
+    """
+    Current resident set size in MB on Linux, the peak elsewhere, None where
+    unavailable
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def _rows(value):
+    shape = getattr(value, 'shape', None)
+    return int(shape[0]) if shape else None
+
+###############################################################################
+#                                   Stages
+###############################################################################
+class _Stage:
+    """
+    Context manager / decorator timing one stage; see stage()
+    """
+    __slots__ = ('name', 'rows', 'args', '_t0', '_rss0', '_profile')
+
+    def __init__(self, name, rows=None, args=None):
+        self.name, self.rows, self.args = name, rows, args
+        self._profile = None
+
+    def __enter__(self):
+        if _state is None:
+            return self
+        if _state['profile_dir'] and not getattr(_local, 'profiling', False) and \
+                (not _state['profile_stages'] or self.name in _state['profile_stages']):
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:   # another profiler is active in this thread
+                pass
+            else:
+                self._profile, _local.profiling = profile, True
+        self._rss0 = _rss_mb()
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if _state is None:
+            return False
+        t1 = time.perf_counter_ns()
+        if self._profile is not None:
+            self._profile.disable()
+            _local.profiling = False
+            profile_dir = Path(_state['profile_dir'])
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(profile_dir / f'{self.name}.{os.getpid()}.{next(_profile_count)}.prof')
+            self._profile = None
+        rss = _rss_mb()
+        args = dict(self.args or {})
+        if self.rows is not None:
+            args['rows'] = int(self.rows)
+        if rss is not None and self._rss0 is not None:
+            args['rss_mb'] = round(rss, 1)
+            args['rss_delta_mb'] = round(rss - self._rss0, 1)
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        _record({'name': self.name, 'cat': 'stage', 'ph': 'X',
+                 'ts': self._t0 // 1000, 'dur': (t1 - self._t0) // 1000,
+                 'pid': os.getpid(), 'tid': threading.get_native_id(), 'args': args})
+        logger.info(f"{self.name}: {(t1 - self._t0) / 1e6:.1f} ms"
+                    + (f", {args['rows']} rows" if 'rows' in args else '')
+                    + (f", {args['rss_delta_mb']:+.1f} MB" if 'rss_delta_mb' in args else ''))
+        return False
+
+    def __call__(self, func):
+        # named after the file, not __module__, which is '__main__' for a script
+        name = self.name or f'{Path(func.__code__.co_filename).stem}.{func.__qualname__}'
+        rows, args = self.rows, self.args
+
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            if _state is None:
+                return func(*a, **kw)
+            with _Stage(name, None, args) as s:
+                result = func(*a, **kw)
+                s.rows = _rows(result) if rows is None else rows(result)
+            return result
+        return wrapper
+
+def stage(name=None, rows=None, **args):
+    """
+    Timed stage, as a context manager (`with stage('name') as s`, set s.rows
+    inside the block) or a decorator (`@stage`, `@stage('name')`,
+    `@stage(rows=len)`). rows, for a decorator, maps the return value to a
+    row count (default: the length of a DataFrame / array). Extra keyword
+    arguments are stored with the event.
+    """
+    if callable(name):
+        return _Stage(None)(name)
+    return _Stage(name, rows, args or None)
+
+###############################################################################
+#                                   Trace
+###############################################################################
+def _part_files(trace):
+    return sorted(trace.parent.glob(f'.{trace.name}.*.jsonl'))
+
+def _record(event):
+    part = _state['trace'].with_name(f".{_state['trace'].name}.{os.getpid()}.jsonl")
+    with open(part, 'a') as f:
+        f.write(json.dumps(event, default=str) + '\n')
+
+def enabled():
+    return _state is not None
+
+def enable(trace='stage_trace.json', profile_dir=None, profile_stages=None):
+    """
+    Start recording stages of this process and of the worker processes it
+    starts. The trace is written at exit or by disable().
+
+    profile_dir: dump a cProfile of every outermost stage there
+    profile_stages: only profile the stages with these names
+    """
+    global _state
+    trace = Path(trace).resolve()
+    trace.parent.mkdir(parents=True, exist_ok=True)
+    owner = int(os.environ.get(ENV_OWNER) or os.getpid())
+    if owner == os.getpid():
+        for part in _part_files(trace):
+            part.unlink()
+        atexit.register(write_trace)
+    _state = {'trace': trace, 'owner': owner,
+              'profile_dir': str(Path(profile_dir).resolve()) if profile_dir else None,
+              'profile_stages': set(profile_stages or [])}
+    os.environ[ENV_TRACE] = str(trace)
+    os.environ[ENV_OWNER] = str(owner)
+    if profile_dir:
+        os.environ[ENV_PROFILE] = _state['profile_dir']
+    if profile_stages:
+        os.environ[ENV_PROFILE_STAGES] = ','.join(profile_stages)
+
+def write_trace():
+    """
+    Merge the part files of every process into the Chrome trace; only the
+    enabling process writes it. Returns the trace path, or None.
+    """
+    if _state is None or _state['owner'] != os.getpid():
+        return None
+    trace = _state['trace']
+    events = []
+    for part in _part_files(trace):
+        with open(part) as f:
+            events += [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda e: e['ts'])
+    tmp = trace.with_name(f'.{trace.name}.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))
+    os.replace(tmp, trace)
+    for part in _part_files(trace):
+        part.unlink()
+    logger.info(f"{len(events)} stage events -> {trace}")
+    return trace
+
+def disable():
+    """
+    Stop recording and write the trace
+    """
+    global _state
+    trace = write_trace()
+    _state = None
+    for key in (ENV_TRACE, ENV_PROFILE, ENV_PROFILE_STAGES, ENV_OWNER):
+        os.environ.pop(key, None)
+    return trace
+
+if os.environ.get(ENV_TRACE):
+    enable(os.environ[ENV_TRACE], os.environ.get(ENV_PROFILE),
+           [s for s in os.environ.get(ENV_PROFILE_STAGES, '').split(',') if s])
+
+###############################################################################
+#                                  Summary
+###############################################################################
+def summarize(trace):
+    """
+    {stage: {calls, total_ms, max_ms, rows, max_rss_delta_mb}} of a trace,
+    largest total first
+    """
+    events = json.loads(Path(trace).read_text())['traceEvents']
+    summary = {}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        s = summary.setdefault(event['name'], {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                               'rows': 0, 'max_rss_delta_mb': 0.0})
+        ms = event['dur'] / 1000
+        s['calls'] += 1
+        s['total_ms'] += ms
+        s['max_ms'] = max(s['max_ms'], ms)
+        s['rows'] += event['args'].get('rows', 0)
+        s['max_rss_delta_mb'] = max(s['max_rss_delta_mb'], event['args'].get('rss_delta_mb', 0.0))
+    return dict(sorted(summary.items(), key=lambda item: -item[1]['total_ms']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-stage summary of a stage trace")
+    parser.add_argument('trace')
+    args = parser.parse_args()
+
+    print(f"{'stage':48s} {'calls':>6s} {'total ms':>10s} {'max ms':>10s} {'rows':>12s} {'max +MB':>8s}")
+    for name, s in summarize(args.trace).items():
+        print(f"{name:48s} {s['calls']:6d} {s['total_ms']:10.1f} {s['max_ms']:10.1f} "
+              f"{s['rows']:12d} {s['max_rss_delta_mb']:8.1f}")